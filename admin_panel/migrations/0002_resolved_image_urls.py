@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='app',
+            name='app_image_url',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+    ]
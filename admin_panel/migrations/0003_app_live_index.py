@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0002_resolved_image_urls'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='app',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['id'], name='app_live_idx'),
+        ),
+    ]
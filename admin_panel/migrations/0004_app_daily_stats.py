@@ -0,0 +1,30 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0003_app_live_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('submissions', models.PositiveIntegerField(default=0)),
+                ('verifications', models.PositiveIntegerField(default=0)),
+                ('rejections', models.PositiveIntegerField(default=0)),
+                ('points_awarded', models.PositiveIntegerField(default=0)),
+                ('app', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='admin_panel.app')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'app'], name='app_daily_stats_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('app', 'day'), name='app_daily_stats_unique')],
+            },
+        ),
+    ]
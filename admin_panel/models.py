@@ -1,6 +1,9 @@
 from django.db import models
 from cloudinary.models import CloudinaryField
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import UploadedFile
+from trustpoints_backend.media_urls import resource_url
+from trustpoints_backend.metrics import timed
 
 User = get_user_model()
 
@@ -11,6 +14,8 @@ class App(models.Model):
     sub_category = models.CharField(max_length=100)
     points = models.PositiveIntegerField()
     app_image = CloudinaryField('image')
+    # Delivery URL of app_image, resolved at save time so lists don't build it per row
+    app_image_url = models.CharField(max_length=500, blank=True, default='')
 
     # Soft deletion
     is_deleted = models.BooleanField(default=False)
@@ -22,10 +27,55 @@ class App(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Catalog and admin lists only read live apps
+            models.Index(fields=["id"], condition=models.Q(is_deleted=False), name="app_live_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        field = self._meta.get_field('app_image')
+        if isinstance(self.app_image, UploadedFile):
+            # Upload before the INSERT/UPDATE (which would do it anyway) so it is timed as storage
+            with timed('storage'):
+                field.pre_save(self, self._state.adding)
+        self.app_image_url = resource_url(field.to_python(self.app_image)) or ''
+        super().save(*args, **kwargs)
+        if self.app_image and not self.app_image_url:
+            # A new file only gets its Cloudinary id while saving
+            self.app_image_url = resource_url(self.app_image) or ''
+            App.objects.filter(pk=self.pk).update(app_image_url=self.app_image_url)
+
     def soft_delete(self):
         """Marks the app as deleted instead of actually deleting it."""
         self.is_deleted = True
         self.save()
+
+
+class AppDailyStats(models.Model):
+    """
+    Per-app, per-day task activity for the admin dashboard. Kept current by
+    ``admin_panel.rollups`` as tasks are submitted and reviewed;
+    ``manage.py backfill_app_stats`` rebuilds it from history.
+    """
+    app = models.ForeignKey(App, on_delete=models.CASCADE, related_name="daily_stats")
+    day = models.DateField()
+    submissions = models.PositiveIntegerField(default=0)
+    verifications = models.PositiveIntegerField(default=0)
+    rejections = models.PositiveIntegerField(default=0)
+    points_awarded = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["app", "day"], name="app_daily_stats_unique"),
+        ]
+        indexes = [
+            # Dashboard ranges read every app for a span of days
+            models.Index(fields=["day", "app"], name="app_daily_stats_day_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.app_id} {self.day}"
@@ -0,0 +1,174 @@
+import base64
+import hashlib
+import json
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+COUNT_CACHE_KEY = "admin_panel:count:{digest}"
+
+
+class CountingPaginator(Paginator):
+    """Django paginator whose total comes from ``counter(object_list)``."""
+
+    def __init__(self, object_list, per_page, counter, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.counter = counter
+
+    @cached_property
+    def count(self):
+        return self.counter(self.object_list)
+
+
+class AdminPagination(PageNumberPagination):
+    """
+    Page-number pagination for admin lists that counts the rows once.
+
+    ``count_mode`` (default ``ADMIN_PAGINATION_COUNT``) picks how ``count``
+    is obtained:
+
+    ``exact``        one ``COUNT(*)`` per request
+    ``cached``       the ``COUNT(*)`` of the same query is reused for
+                     ``ADMIN_COUNT_CACHE_TIMEOUT`` seconds
+    ``approximate``  PostgreSQL's planner estimate, flagged in the response
+                     with ``"count_is_estimate": true``; small results
+                     (below ``ADMIN_APPROXIMATE_COUNT_THRESHOLD``) and other
+                     databases get an exact count
+
+    Lists that don't need a total at all should use ``KeysetPagination``.
+    """
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    count_mode = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_is_estimate = False
+        return super().paginate_queryset(queryset, request, view)
+
+    @property
+    def django_paginator_class(self):
+        return partial(CountingPaginator, counter=self.count_rows)
+
+    def count_rows(self, queryset):
+        mode = self.count_mode or settings.ADMIN_PAGINATION_COUNT
+        if mode == "cached":
+            return self.cached_count(queryset)
+        if mode == "approximate":
+            estimate = self.estimated_count(queryset)
+            if estimate is not None and estimate >= settings.ADMIN_APPROXIMATE_COUNT_THRESHOLD:
+                self.count_is_estimate = True
+                return estimate
+        return queryset.count()
+
+    def cached_count(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.sha256(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+        key = COUNT_CACHE_KEY.format(digest=digest)
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def estimated_count(self, queryset):
+        """Row estimate from the PostgreSQL planner, or None on other databases."""
+        if connections[queryset.db].vendor != "postgresql":
+            return None
+        plan = json.loads(queryset.order_by().explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count_is_estimate:
+            response.data["count_is_estimate"] = True
+        return response
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination ordered by ``(created_at, id)``.
+
+    Each page continues strictly after the last row of the previous one, so
+    fetching a page costs an index range scan of ``page_size`` rows no matter
+    how deep into the history the client is. No ``COUNT(*)`` is run.
+    """
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by("created_at", "id")
+        if position is not None:
+            created_at, pk = position
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_position = (results[-1].created_at, results[-1].id) if self.has_next else None
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            created_at, pk = base64.urlsafe_b64decode(encoded.encode()).decode().split("|")
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, pk
+
+    def encode_cursor(self, position):
+        created_at, pk = position
+        token = f"{created_at.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(token.encode()).decode()
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
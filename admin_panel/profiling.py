@@ -0,0 +1,167 @@
+"""
+On-demand request profiling for admins.
+
+An admin adds ``X-Profile: 1`` (or ``?_profile=1``) to any request;
+``ProfilingMiddleware`` checks the bearer token against ``IsCustomAdmin``
+and runs the request under ``cProfile``. Other requests only pay for the
+header/query lookup.
+
+``cProfile`` only sees the thread it is enabled in. Under ASGI a sync view
+runs in a worker thread, so a profiled request for one is run through
+``sync_to_async``/``async_to_sync``: asgiref hands the view back to the
+thread that called ``async_to_sync``, which is the one being profiled.
+Async views are profiled on the event loop.
+
+Profiles go to a ring buffer of ``PROFILE_BUFFER_SIZE`` slots in the cache:
+a sequence number from ``cache.incr`` picks the slot, and the oldest
+profile is overwritten. Other workers only see them through a shared cache
+(``CACHE_URL``, see the deploy checks). The
+response carries the profile id in ``X-Profile-Id``; the admin_panel
+``profiles/`` endpoints list, summarize and download profiles (pstats
+format, for ``python -m pstats`` or snakeviz).
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import time
+from types import SimpleNamespace
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from auth_system.authentication import ClaimsJWTAuthentication
+from .permissions import IsCustomAdmin
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_QUERY_PARAM = "_profile"
+SEQUENCE_KEY = "admin_panel:profiles:sequence"
+SLOT_KEY = "admin_panel:profiles:slot:{slot}"
+
+
+def wants_profile(request):
+    return request.headers.get(PROFILE_HEADER) == "1" or request.GET.get(PROFILE_QUERY_PARAM) == "1"
+
+
+def is_admin_request(request):
+    """Authenticates the bearer token like the admin views do, without touching ``request.user``."""
+    try:
+        result = ClaimsJWTAuthentication().authenticate(Request(request))
+    except APIException:
+        return None
+    if result is None:
+        return None
+    user = result[0]
+    return user if IsCustomAdmin().has_permission(SimpleNamespace(user=user), None) else None
+
+
+def save_profile(profiler, request, response, user, duration):
+    """Stores a finished profile in the ring buffer and returns its id."""
+    profiler.create_stats()
+    cache.add(SEQUENCE_KEY, 0, timeout=None)
+    profile_id = cache.incr(SEQUENCE_KEY)
+    cache.set(SLOT_KEY.format(slot=profile_id % settings.PROFILE_BUFFER_SIZE), {
+        "id": profile_id,
+        "method": request.method,
+        "path": request.get_full_path(),
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 3),
+        "user_id": user.id,
+        "created_at": timezone.now().isoformat(),
+        "stats": marshal.dumps(profiler.stats),
+    }, timeout=settings.PROFILE_TIMEOUT)
+    return profile_id
+
+
+def get_profile(profile_id):
+    entry = cache.get(SLOT_KEY.format(slot=profile_id % settings.PROFILE_BUFFER_SIZE))
+    # The slot may hold a newer profile by now
+    return entry if entry is not None and entry["id"] == profile_id else None
+
+
+def list_profiles():
+    """Stored profiles without their stats, newest first."""
+    keys = [SLOT_KEY.format(slot=slot) for slot in range(settings.PROFILE_BUFFER_SIZE)]
+    entries = [
+        {key: value for key, value in entry.items() if key != "stats"}
+        for entry in cache.get_many(keys).values()
+    ]
+    return sorted(entries, key=lambda entry: entry["id"], reverse=True)
+
+
+def summarize(entry, sort="cumulative", limit=40):
+    """Text report of the top ``limit`` functions, as ``pstats`` prints it."""
+    stream = io.StringIO()
+    stats = pstats.Stats(stream=stream)
+    stats.stats = marshal.loads(entry["stats"])
+    stats.get_top_level_stats()
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def runs_on_event_loop(request):
+    """Whether the view for this request is async (unresolvable paths count as async)."""
+    try:
+        return iscoroutinefunction(resolve(request.path_info).func)
+    except Resolver404:
+        return True
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not wants_profile(request):
+            return self.get_response(request)
+        user = is_admin_request(request)
+        if user is None:
+            return self.get_response(request)
+        return self.profile(self.get_response, request, user)
+
+    async def __acall__(self, request):
+        if not wants_profile(request):
+            return await self.get_response(request)
+        user = await sync_to_async(is_admin_request)(request)
+        if user is None:
+            return await self.get_response(request)
+
+        if not runs_on_event_loop(request):
+            return await sync_to_async(self.profile)(async_to_sync(self.get_response), request, user)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        return self.finish(profiler, request, response, user, time.perf_counter() - started)
+
+    def profile(self, get_response, request, user):
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+        return self.finish(profiler, request, response, user, time.perf_counter() - started)
+
+    @staticmethod
+    def finish(profiler, request, response, user, duration):
+        response["X-Profile-Id"] = str(save_profile(profiler, request, response, user, duration))
+        return response
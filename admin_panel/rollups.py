@@ -0,0 +1,110 @@
+"""
+Daily per-app task rollups.
+
+Task transitions add to ``AppDailyStats`` in the same transaction as the
+status change: submissions count on the day the task was submitted,
+verifications, rejections and points on the day of the review. Each call
+costs two queries whatever the number of apps: an insert of missing rows
+that ignores existing ones, then one ``F()`` update using a ``Case`` per
+counter, so concurrent transitions add up instead of overwriting each other.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from user_panel.models import PointsTransaction, Task
+from .models import AppDailyStats
+
+COUNTERS = ("submissions", "verifications", "rejections", "points_awarded")
+
+
+def add_stats(deltas, day=None):
+    """Adds ``deltas[app_id] = {counter: amount}`` to the rollup for ``day`` (default today)."""
+    deltas = {app_id: counts for app_id, counts in deltas.items() if any(counts.values())}
+    if not deltas:
+        return
+    day = day or timezone.localdate()
+
+    AppDailyStats.objects.bulk_create(
+        [AppDailyStats(app_id=app_id, day=day) for app_id in deltas], ignore_conflicts=True
+    )
+    changes = {}
+    for counter in COUNTERS:
+        amounts = {app_id: counts[counter] for app_id, counts in deltas.items() if counts.get(counter)}
+        if amounts:
+            changes[counter] = F(counter) + Case(
+                *[When(app_id=app_id, then=Value(amount)) for app_id, amount in amounts.items()],
+                default=Value(0), output_field=models.PositiveIntegerField(),
+            )
+    AppDailyStats.objects.filter(day=day, app_id__in=deltas).update(**changes)
+
+
+def record_submission(app_id):
+    add_stats({app_id: {"submissions": 1}})
+
+
+def record_reviews(reviews, verdict):
+    """Records reviewed tasks given as ``[(app_id, points), ...]`` with ``verdict`` "verified" or "rejected"."""
+    deltas = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for app_id, points in reviews:
+        if verdict == "verified":
+            deltas[app_id]["verifications"] += 1
+            deltas[app_id]["points_awarded"] += points
+        else:
+            deltas[app_id]["rejections"] += 1
+    add_stats(deltas)
+
+
+def rebuild_stats(start, end):
+    """
+    Recomputes the rollup for the days ``start``..``end`` from history,
+    replacing what is stored for them. Submissions come from task creation
+    times, verifications and points from the points ledger, rejections from
+    the last update of rejected tasks. Returns the number of rows written.
+
+    Live transitions only add to today's rows, so a range ending before
+    today is safe to rebuild at any time. Including today loses transitions
+    that commit between the aggregate reads and the replace on databases
+    whose transactions don't lock on begin (SQLite's IMMEDIATE mode does);
+    only do that while no reviews or submissions run, e.g. when seeding.
+    """
+    since = timezone.make_aware(datetime.combine(start, time.min))
+    until = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    stats = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+    with transaction.atomic():
+        _aggregate(stats, since, until)
+        AppDailyStats.objects.filter(day__range=(start, end)).delete()
+        AppDailyStats.objects.bulk_create(
+            [AppDailyStats(app_id=app_id, day=day, **counts) for (app_id, day), counts in stats.items()],
+            batch_size=1000,
+        )
+    return len(stats)
+
+
+def _aggregate(stats, since, until):
+    submissions = (
+        Task.objects.filter(created_at__gte=since, created_at__lt=until)
+        .values("app_id", day=TruncDate("created_at")).annotate(total=Count("id")).order_by()
+    )
+    for row in submissions:
+        stats[row["app_id"], row["day"]]["submissions"] = row["total"]
+
+    verifications = (
+        PointsTransaction.objects.filter(created_at__gte=since, created_at__lt=until)
+        .values(app_id=F("task__app_id"), day=TruncDate("created_at"))
+        .annotate(total=Count("id"), points=Sum("points")).order_by()
+    )
+    for row in verifications:
+        stats[row["app_id"], row["day"]].update(verifications=row["total"], points_awarded=row["points"])
+
+    rejections = (
+        Task.objects.filter(status="rejected", updated_at__gte=since, updated_at__lt=until)
+        .values("app_id", day=TruncDate("updated_at")).annotate(total=Count("id")).order_by()
+    )
+    for row in rejections:
+        stats[row["app_id"], row["day"]]["rejections"] = row["total"]
@@ -1,13 +1,22 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 from .models import App
 from auth_system.models import AppUser
+from user_panel.models import Task
+from trustpoints_backend.metrics import TimedSerializerMixin
+from user_panel.serializers import TaskSerializer, stored_url
 
-class AppSerializer(serializers.ModelSerializer):
+class AppSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     app_image = serializers.ImageField(required=True)  # Explicitly declare the image field
 
     class Meta:
         model = App
-        fields = '__all__'  # Include all fields
+        exclude = ['app_image_url']  # Include all fields (app_image_url is derived on save)
+
+        # Row fast path (see trustpoints_backend.rows): the saved URL is what ImageField returns
+        row_fields = {"app_image": (["app_image_url", "app_image"], stored_url)}
 
     def create(self, validated_data):
         request = self.context.get("request")
@@ -34,7 +43,7 @@ class AppSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
-class AdminSerializer(serializers.ModelSerializer):
+class AdminSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = AppUser
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'role', 'is_admin']
@@ -45,3 +54,58 @@ class AdminSerializer(serializers.ModelSerializer):
         validated_data['is_admin'] = True
         return super().create(validated_data)
 
+
+class AdminTaskSerializer(TaskSerializer):
+    """Task representation for moderators, including the duplicate-screenshot flag."""
+
+    class Meta(TaskSerializer.Meta):
+        fields = TaskSerializer.Meta.fields + ["duplicate_of"]
+        only = TaskSerializer.Meta.only + ["duplicate_of"]
+
+class TaskFilterSerializer(serializers.Serializer):
+    """Validates the query-string filters of the admin task queue."""
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    app = serializers.IntegerField(required=False, min_value=1)
+    user = serializers.IntegerField(required=False, min_value=1)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    flagged = serializers.BooleanField(required=False)  # only tasks flagged as duplicate screenshots
+
+    def filter_queryset(self, queryset):
+        filters = self.validated_data
+        if "status" in filters:
+            queryset = queryset.filter(status=filters["status"])
+        if "app" in filters:
+            queryset = queryset.filter(app_id=filters["app"])
+        if "user" in filters:
+            queryset = queryset.filter(user_id=filters["user"])
+        if "created_after" in filters:
+            queryset = queryset.filter(created_at__gte=filters["created_after"])
+        if "created_before" in filters:
+            queryset = queryset.filter(created_at__lt=filters["created_before"])
+        if filters.get("flagged"):
+            queryset = queryset.filter(duplicate_of__isnull=False)
+        return queryset
+
+
+class BulkReviewSerializer(serializers.Serializer):
+    task_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500
+    )
+    verdict = serializers.ChoiceField(choices=["verified", "rejected"])
+
+
+class StatsRangeSerializer(serializers.Serializer):
+    """Validates the date range of the dashboard stats; defaults to the last 30 days."""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    app = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, data):
+        data.setdefault("end", timezone.localdate())
+        data.setdefault("start", data["end"] - timedelta(days=29))
+        if data["start"] > data["end"]:
+            raise serializers.ValidationError("start must not be after end")
+        if (data["end"] - data["start"]).days >= 366:
+            raise serializers.ValidationError("range is limited to 366 days")
+        return data
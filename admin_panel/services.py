@@ -0,0 +1,124 @@
+"""
+Task review state transitions.
+
+Every transition is a conditional ``UPDATE ... WHERE status='pending'``, so
+concurrent reviewers race on the task row only: whoever flips it first wins
+and everyone else sees zero affected rows. Points are credited with ``F()``
+expressions, never by rewriting a user row loaded earlier.
+"""
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from user_panel.counters import move_task, move_tasks
+from user_panel.leaderboard import leaderboard
+from user_panel.models import PointsTransaction, Task
+from .rollups import record_reviews
+
+AppUser = get_user_model()
+
+
+def _claim_pending(task_id, new_status):
+    """Moves a pending task to ``new_status``; returns False if it was no longer pending."""
+    return Task.objects.filter(id=task_id, status="pending").update(
+        status=new_status, updated_at=timezone.now()
+    ) == 1
+
+
+def verify_task(task):
+    """
+    Verifies a pending task and credits its app's points to the task owner.
+
+    ``task`` needs ``id``, ``user_id``, ``app_id`` and ``app.points`` loaded. Returns the
+    owner's new points balance, or None if the task was not pending.
+    """
+    points = task.app.points
+    with transaction.atomic():
+        if not _claim_pending(task.id, "verified"):
+            return None
+        move_task(task.user_id, "pending", "verified")
+        record_reviews([(task.app_id, points)], "verified")
+        PointsTransaction.objects.create(user_id=task.user_id, task_id=task.id, points=points)
+        AppUser.objects.filter(id=task.user_id).update(points=F("points") + points)
+        new_points, is_admin, is_active = AppUser.objects.values_list("points", "is_admin", "is_active").get(
+            id=task.user_id
+        )
+        transaction.on_commit(
+            lambda: leaderboard.record(task.user_id, new_points, ranked=is_active and not is_admin)
+        )
+    return new_points
+
+
+def reject_task(task):
+    """Rejects a pending task. ``task`` needs ``id``, ``user_id`` and ``app_id`` loaded. Returns False if it was not pending."""
+    with transaction.atomic():
+        if not _claim_pending(task.id, "rejected"):
+            return False
+        move_task(task.user_id, "pending", "rejected")
+        record_reviews([(task.app_id, 0)], "rejected")
+    return True
+
+
+def review_tasks(task_ids, verdict):
+    """
+    Applies ``verdict`` ("verified" or "rejected") to many tasks at once.
+
+    Costs a fixed number of queries whatever the batch size: one locking
+    read, one status update, one grouped status-counter update, two
+    rollup queries (see ``rollups``), and for verification one ledger insert, one grouped balance update for all
+    affected users and one balance read. Returns a dict mapping
+    each requested id to ``verdict``, "already_processed" or "not_found".
+    """
+    results = dict.fromkeys(task_ids, "not_found")
+
+    with transaction.atomic():
+        rows = (
+            Task.objects.select_for_update(of=("self",))
+            .filter(id__in=results)
+            .values_list("id", "status", "user_id", "app_id", "app__points")
+        )
+        pending = []
+        for task_id, task_status, user_id, app_id, points in rows:
+            if task_status == "pending":
+                pending.append((task_id, user_id, app_id, points))
+            else:
+                results[task_id] = "already_processed"
+
+        if not pending:
+            return results
+
+        Task.objects.filter(id__in=[task_id for task_id, _, _, _ in pending]).update(
+            status=verdict, updated_at=timezone.now()
+        )
+        moves = defaultdict(int)
+        for _, user_id, _, _ in pending:
+            moves[user_id] += 1
+        move_tasks(moves, "pending", verdict)
+        record_reviews([(app_id, points) for _, _, app_id, points in pending], verdict)
+
+        if verdict == "verified":
+            PointsTransaction.objects.bulk_create([
+                PointsTransaction(user_id=user_id, task_id=task_id, points=points)
+                for task_id, user_id, _, points in pending
+            ])
+            credits = defaultdict(int)
+            for _, user_id, _, points in pending:
+                credits[user_id] += points
+            AppUser.objects.filter(id__in=credits).update(points=F("points") + Case(
+                *[When(id=user_id, then=Value(points)) for user_id, points in credits.items()],
+                output_field=models.PositiveIntegerField(),
+            ))
+            balances = list(
+                AppUser.objects.filter(id__in=credits).values_list("id", "points", "is_admin", "is_active")
+            )
+            transaction.on_commit(lambda: [
+                leaderboard.record(user_id, points, ranked=is_active and not is_admin)
+                for user_id, points, is_admin, is_active in balances
+            ])
+
+    for task_id, _, _, _ in pending:
+        results[task_id] = verdict
+    return results
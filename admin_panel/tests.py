@@ -1,3 +1,410 @@
-from django.test import TestCase
+import marshal
+import pstats
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from auth_system.models import AppUser
+from auth_system.tokens import tokens_for_user
+from user_panel.counters import get_counts, rebuild_counts
+from user_panel.models import PointsTransaction, Task, TaskStatusCounts
+from user_panel.tests import create_app
+from .models import AppDailyStats
+from .pagination import AdminPagination
+from .profiling import SEQUENCE_KEY, get_profile, list_profiles
+from .rollups import record_submission
+from .services import verify_task
+
+
+class AllTasksListViewTests(TestCase):
+    def setUp(self):
+        self.admin = AppUser.objects.create(username="admin", role="admin", is_admin=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def create_tasks(self, count, **kwargs):
+        tasks = []
+        for i in range(count):
+            user = AppUser.objects.create(username=f"user{AppUser.objects.count()}")
+            app = create_app(f"App{Task.objects.count()}")
+            tasks.append(Task.objects.create(user=user, app=app, screenshot=f"shots/{app.id}", **kwargs))
+        return tasks
+
+    def test_query_count_is_constant(self):
+        self.create_tasks(2)
+        with self.assertNumQueries(1):
+            response = self.client.get("/admin_panel/tasks/")
+        self.assertEqual(len(response.json()["results"]), 2)
+
+        self.create_tasks(20)
+        with self.assertNumQueries(1):
+            response = self.client.get("/admin_panel/tasks/?page_size=50")
+        self.assertEqual(len(response.json()["results"]), 22)
+
+    def test_keyset_pages_cover_every_task_once(self):
+        tasks = self.create_tasks(7)
+        # Identical timestamps must still be split by the id tie-breaker
+        Task.objects.filter(id__in=[t.id for t in tasks[2:5]]).update(created_at=tasks[2].created_at)
+
+        seen = []
+        url = "/admin_panel/tasks/?page_size=3"
+        while url:
+            body = self.client.get(url).json()
+            seen.extend(task["id"] for task in body["results"])
+            url = body["next"]
+        self.assertEqual(seen, sorted(t.id for t in tasks))
+
+    def test_filters(self):
+        pending = self.create_tasks(2)
+        verified = self.create_tasks(1, status="verified")
+
+        body = self.client.get("/admin_panel/tasks/?status=pending").json()
+        self.assertEqual([t["id"] for t in body["results"]], [t.id for t in pending])
+        self.assertIsNone(body["next"])
+
+        body = self.client.get(f"/admin_panel/tasks/?app={verified[0].app_id}").json()
+        self.assertEqual([t["id"] for t in body["results"]], [verified[0].id])
+
+        body = self.client.get(f"/admin_panel/tasks/?user={pending[1].user_id}").json()
+        self.assertEqual([t["id"] for t in body["results"]], [pending[1].id])
+
+        cutoff = verified[0].created_at.isoformat()
+        body = self.client.get("/admin_panel/tasks/", {"created_before": cutoff}).json()
+        self.assertEqual([t["id"] for t in body["results"]], [t.id for t in pending])
+        body = self.client.get("/admin_panel/tasks/", {"created_after": cutoff}).json()
+        self.assertEqual([t["id"] for t in body["results"]], [verified[0].id])
+
+    def test_flagged_filter(self):
+        original, duplicate = self.create_tasks(2)
+        Task.objects.filter(id=duplicate.id).update(duplicate_of=original)
+
+        body = self.client.get("/admin_panel/tasks/?flagged=true").json()
+        self.assertEqual([(t["id"], t["duplicate_of"]) for t in body["results"]], [(duplicate.id, original.id)])
+        self.assertEqual(len(self.client.get("/admin_panel/tasks/?flagged=false").json()["results"]), 2)
+
+    def test_invalid_filter_and_cursor(self):
+        self.assertEqual(self.client.get("/admin_panel/tasks/?status=bogus").status_code, 400)
+        self.assertEqual(self.client.get("/admin_panel/tasks/?cursor=bogus").status_code, 404)
+
+
+class TaskReviewTests(TestCase):
+    def setUp(self):
+        self.admin = AppUser.objects.create(username="admin", role="admin", is_admin=True)
+        self.user = AppUser.objects.create(username="alice", points=5)
+        self.app = create_app("Chat", points=40)
+        self.task = Task.objects.create(user=self.user, app=self.app, screenshot="shots/1")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_verify_credits_points_once(self):
+        response = self.client.put(f"/admin_panel/tasks/{self.task.id}/verify/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["new_points"], 45)
+
+        response = self.client.put(f"/admin_panel/tasks/{self.task.id}/verify/")
+        self.assertEqual(response.status_code, 400)
+
+        self.user.refresh_from_db()
+        self.task.refresh_from_db()
+        self.assertEqual(self.user.points, 45)
+        self.assertEqual(self.task.status, "verified")
+        ledger = PointsTransaction.objects.get()
+        self.assertEqual((ledger.user_id, ledger.task_id, ledger.points), (self.user.id, self.task.id, 40))
+
+    def test_concurrent_verification_credits_once(self):
+        # Both reviewers loaded the task while it was still pending
+        first = Task.objects.select_related("app").get(id=self.task.id)
+        second = Task.objects.select_related("app").get(id=self.task.id)
+
+        self.assertEqual(verify_task(first), 45)
+        self.assertIsNone(verify_task(second))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 45)
+        self.assertEqual(PointsTransaction.objects.count(), 1)
+
+    def test_verify_does_not_rewrite_user_row(self):
+        # A concurrent profile edit must survive the credit
+        stale = Task.objects.select_related("app").get(id=self.task.id)
+        AppUser.objects.filter(id=self.user.id).update(first_name="Alice")
+        verify_task(stale)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.first_name, self.user.points), ("Alice", 45))
+
+    def test_reject(self):
+        response = self.client.put(f"/admin_panel/tasks/{self.task.id}/reject/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.put(f"/admin_panel/tasks/{self.task.id}/verify/").status_code, 400)
+        self.assertEqual(self.client.put(f"/admin_panel/tasks/{self.task.id}/reject/").status_code, 400)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.points, 5)
+
+    def test_missing_task(self):
+        self.assertEqual(self.client.put("/admin_panel/tasks/999/verify/").status_code, 404)
+
+    def test_task_detail_is_admin_only(self):
+        response = self.client.get(f"/admin_panel/task/{self.task.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("duplicate_of", response.json())
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(f"/admin_panel/task/{self.task.id}/").status_code, 403)
+
+
+class BulkReviewTasksViewTests(TestCase):
+    def setUp(self):
+        self.admin = AppUser.objects.create(username="admin", role="admin", is_admin=True)
+        self.users = [AppUser.objects.create(username=f"user{i}") for i in range(3)]
+        self.apps = [create_app(f"App{i}", points=10 * (i + 1)) for i in range(4)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def create_tasks(self):
+        return [
+            Task.objects.create(user=user, app=app, screenshot="shots/x")
+            for user in self.users for app in self.apps
+        ]
+
+    def review(self, task_ids, verdict):
+        response = self.client.post(
+            "/admin_panel/tasks/bulk-review/", {"task_ids": task_ids, "verdict": verdict}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        return {r["task_id"]: r["result"] for r in response.json()["results"]}
+
+    def test_bulk_verify_credits_grouped_points(self):
+        tasks = self.create_tasks()
+        Task.objects.filter(id=tasks[0].id).update(status="rejected")
+
+        results = self.review([t.id for t in tasks] + [999], "verified")
+
+        self.assertEqual(results[tasks[0].id], "already_processed")
+        self.assertEqual(results[999], "not_found")
+        self.assertEqual(sum(r == "verified" for r in results.values()), len(tasks) - 1)
+        points = dict(AppUser.objects.filter(id__in=[u.id for u in self.users]).values_list("username", "points"))
+        self.assertEqual(points, {"user0": 90, "user1": 100, "user2": 100})
+        self.assertEqual(PointsTransaction.objects.count(), len(tasks) - 1)
+
+        # A repeated batch changes nothing
+        results = self.review([t.id for t in tasks], "verified")
+        self.assertEqual(set(results.values()), {"already_processed"})
+        self.assertEqual(AppUser.objects.get(username="user1").points, 100)
+
+    def test_bulk_reject(self):
+        tasks = self.create_tasks()
+        results = self.review([t.id for t in tasks], "rejected")
+        self.assertEqual(set(results.values()), {"rejected"})
+        self.assertFalse(Task.objects.exclude(status="rejected").exists())
+        self.assertFalse(PointsTransaction.objects.exists())
+
+    def test_query_count_does_not_grow_with_batch(self):
+        tasks = self.create_tasks()
+        rebuild_counts()
+        with self.assertNumQueries(10):
+            self.review([t.id for t in tasks[:2]], "verified")
+        with self.assertNumQueries(10):
+            self.review([t.id for t in tasks[2:]], "verified")
+
+    def test_status_counters_follow_review(self):
+        tasks = self.create_tasks()
+        rebuild_counts()
+        self.review([t.id for t in tasks[:5]], "verified")
+        self.review([t.id for t in tasks[5:7]], "rejected")
+
+        counts = dict(TaskStatusCounts.objects.values_list("user_id", "verified"))
+        self.assertEqual(counts, {self.users[0].id: 4, self.users[1].id: 1, self.users[2].id: 0})
+        for user in self.users:
+            self.assertEqual(get_counts(user.id), rebuild_counts([user.id])[user.id] | {"total": 4})
+
+    def test_invalid_payload(self):
+        response = self.client.post("/admin_panel/tasks/bulk-review/", {"task_ids": [], "verdict": "verified"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/admin_panel/tasks/bulk-review/", {"task_ids": [1], "verdict": "maybe"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class AppStatsViewTests(TestCase):
+    def setUp(self):
+        self.admin = AppUser.objects.create(username="admin", role="admin", is_admin=True)
+        self.users = [AppUser.objects.create(username=f"user{i}") for i in range(3)]
+        self.chat = create_app("Chat", points=10)
+        self.mail = create_app("Mail", points=25)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def submit(self, user, app):
+        task = Task.objects.create(user=user, app=app, screenshot="shots/x")
+        record_submission(app.id)
+        return task
+
+    def review(self):
+        chat = [self.submit(user, self.chat) for user in self.users]
+        mail = [self.submit(user, self.mail) for user in self.users[:2]]
+        self.client.put(f"/admin_panel/tasks/{chat[0].id}/verify/")
+        self.client.put(f"/admin_panel/tasks/{chat[1].id}/reject/")
+        self.client.post(
+            "/admin_panel/tasks/bulk-review/", {"task_ids": [t.id for t in mail], "verdict": "verified"}, format="json"
+        )
+
+    def test_stats_are_read_from_rollup(self):
+        self.review()
+        with self.assertNumQueries(2):
+            response = self.client.get("/admin_panel/stats/")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["totals"], {"submissions": 5, "verifications": 3, "rejections": 1, "points_awarded": 60})
+        self.assertEqual(len(data["daily"]), 1)
+        self.assertEqual(
+            [(app["name"], app["submissions"], app["points_awarded"]) for app in data["apps"]],
+            [("Chat", 3, 10), ("Mail", 2, 50)],
+        )
+
+        response = self.client.get(f"/admin_panel/stats/?app={self.mail.id}")
+        self.assertEqual(response.json()["totals"]["submissions"], 2)
+        self.assertEqual(self.client.get("/admin_panel/stats/?start=2025-02-01&end=2025-01-01").status_code, 400)
+
+    def test_backfill_matches_incremental_rollup(self):
+        self.review()
+        columns = ("app_id", "day", "submissions", "verifications", "rejections", "points_awarded")
+        incremental = set(AppDailyStats.objects.values_list(*columns))
+
+        AppDailyStats.objects.all().delete()
+        call_command("backfill_app_stats", "--chunk-days", "1", "--include-today", stdout=StringIO())
+        self.assertEqual(set(AppDailyStats.objects.values_list(*columns)), incremental)
+
+    def test_backfill_leaves_todays_live_rows_alone(self):
+        self.review()
+        today = AppDailyStats.objects.filter(day=timezone.localdate())
+        # An increment that a rebuild would not have seen yet
+        today.update(submissions=F("submissions") + 100)
+        live = set(today.values_list("app_id", "submissions"))
+
+        call_command("backfill_app_stats", "--end", str(timezone.localdate()), stdout=StringIO())
+        self.assertEqual(set(today.values_list("app_id", "submissions")), live)
+
+
+class AdminPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = AppUser.objects.create(username="admin", role="admin", is_admin=True)
+        for i in range(12):
+            create_app(f"App{i}")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_apps_are_counted_once(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/admin_panel/apps/")
+        data = response.json()
+        self.assertEqual((data["count"], data["total_apps"]), (12, 12))
+        self.assertEqual(len(data["results"]), 10)
+        self.assertNotIn("count_is_estimate", data)
+
+    @override_settings(ADMIN_PAGINATION_COUNT="cached")
+    def test_cached_count(self):
+        self.client.get("/admin_panel/apps/")
+        with self.assertNumQueries(1):
+            response = self.client.get("/admin_panel/apps/")
+        self.assertEqual(response.json()["count"], 12)
+        # A different query has its own count
+        self.assertEqual(self.client.get("/admin_panel/apps/?page=2").json()["count"], 12)
+
+    @override_settings(ADMIN_PAGINATION_COUNT="approximate")
+    def test_approximate_count(self):
+        # SQLite has no planner estimate: exact count
+        self.assertEqual(self.client.get("/admin_panel/apps/").json()["count"], 12)
+
+        with mock.patch.object(AdminPagination, "estimated_count", return_value=250000):
+            data = self.client.get("/admin_panel/apps/").json()
+        self.assertEqual((data["count"], data["total_apps"], data["count_is_estimate"]), (250000, 250000, True))
+
+    def test_admin_list_is_paginated(self):
+        AppUser.objects.create(username="other-admin", role="admin", is_admin=True)
+        data = self.client.get("/admin_panel/list-admins/").json()
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["results"][0]["username"], "other-admin")
+
+
+@override_settings(PROFILE_BUFFER_SIZE=3)
+class ProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = AppUser.objects.create(username="admin", role="admin", is_admin=True)
+        self.user = AppUser.objects.create(username="user")
+        create_app("App")
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user).access_token}")
+
+    def test_admin_request_with_header_is_profiled(self):
+        self.authenticate(self.admin)
+        response = self.client.get("/user_panel/apps/", headers={"X-Profile": "1"})
+        self.assertEqual(response.status_code, 200)
+        profile_id = int(response["X-Profile-Id"])
+
+        [entry] = list_profiles()
+        self.assertEqual(entry["id"], profile_id)
+        self.assertEqual((entry["method"], entry["path"], entry["status"]), ("GET", "/user_panel/apps/", 200))
+        self.assertEqual(entry["user_id"], self.admin.id)
+        self.assertNotIn("stats", entry)
+
+    def test_query_flag_enables_profiling(self):
+        self.authenticate(self.admin)
+        response = self.client.get("/user_panel/apps/?_profile=1")
+        self.assertIn("X-Profile-Id", response)
+
+    def test_unflagged_and_non_admin_requests_are_not_profiled(self):
+        self.authenticate(self.admin)
+        self.assertNotIn("X-Profile-Id", self.client.get("/user_panel/apps/"))
+        self.authenticate(self.user)
+        self.assertNotIn("X-Profile-Id", self.client.get("/user_panel/apps/", headers={"X-Profile": "1"}))
+        self.client.credentials()
+        self.assertNotIn("X-Profile-Id", self.client.get("/user_panel/apps/", headers={"X-Profile": "1"}))
+        self.assertIsNone(cache.get(SEQUENCE_KEY))
+
+    def test_summary_and_download(self):
+        self.authenticate(self.admin)
+        profile_id = self.client.get("/user_panel/apps/", headers={"X-Profile": "1"})["X-Profile-Id"]
+
+        response = self.client.get(f"/admin_panel/profiles/{profile_id}/?sort=tottime")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("function calls", response.json()["summary"])
+        self.assertEqual(self.client.get(f"/admin_panel/profiles/{profile_id}/?sort=bogus").status_code, 400)
+
+        response = self.client.get(f"/admin_panel/profiles/{profile_id}/?download=1")
+        self.assertEqual(response["Content-Type"], "application/octet-stream")
+        self.assertIn(f"profile-{profile_id}.prof", response["Content-Disposition"])
+        with tempfile.NamedTemporaryFile(suffix=".prof") as prof:
+            prof.write(response.content)
+            prof.flush()
+            self.assertTrue(pstats.Stats(prof.name).total_calls)
+
+    def test_ring_buffer_keeps_latest_profiles(self):
+        self.authenticate(self.admin)
+        ids = [int(self.client.get("/user_panel/apps/?_profile=1")["X-Profile-Id"]) for _ in range(5)]
+
+        self.assertEqual([entry["id"] for entry in self.client.get("/admin_panel/profiles/").json()], ids[:1:-1])
+        self.assertEqual(self.client.get(f"/admin_panel/profiles/{ids[0]}/").status_code, 404)
+
+    async def test_asgi_profiles_the_sync_view_thread(self):
+        token = await sync_to_async(tokens_for_user)(self.admin)
+        response = await AsyncClient().get(
+            "/user_panel/tasks/", headers={"Authorization": f"Bearer {token.access_token}", "X-Profile": "1"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        entry = await sync_to_async(get_profile)(int(response["X-Profile-Id"]))
+        functions = marshal.loads(entry["stats"])
+        self.assertTrue(any(filename.endswith("trustpoints_backend/rows.py") for filename, _, _ in functions))
+
+    def test_endpoints_require_admin(self):
+        self.authenticate(self.user)
+        self.assertEqual(self.client.get("/admin_panel/profiles/").status_code, 403)
@@ -16,6 +16,12 @@ urlpatterns = [
     path('task/<int:pk>/', TaskDetailView.as_view(), name='task-list'),
     path('tasks/<int:task_id>/verify/', VerifyTaskView.as_view(), name='verify_task'),
     path('tasks/<int:task_id>/reject/', RejectTaskView.as_view(), name='reject_task'),
+    path('tasks/bulk-review/', BulkReviewTasksView.as_view(), name='bulk_review_tasks'),
+
+    path('stats/', AppStatsView.as_view(), name='app-stats'),
+
+    path('profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('profiles/<int:profile_id>/', ProfileDetailView.as_view(), name='profile-detail'),
 
 ]
 
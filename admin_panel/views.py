@@ -1,19 +1,32 @@
+import logging
+import pstats
+
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, status
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
 from user_panel.models import Task
 from user_panel.serializers import TaskSerializer
-from .models import App
-from .serializers import AppSerializer, AdminSerializer
+from .models import App, AppDailyStats
+from .serializers import AppSerializer, AdminSerializer, AdminTaskSerializer, BulkReviewSerializer, StatsRangeSerializer, TaskFilterSerializer
+from .rollups import COUNTERS
+from .pagination import AdminPagination, KeysetPagination
+from .profiling import get_profile, list_profiles, summarize
+from .services import reject_task, review_tasks, verify_task
 from .permissions import IsCustomAdmin  # Import custom permission
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from django.db.models import Q, Sum
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
+from trustpoints_backend.query_plan import QueryPlanMixin
+from trustpoints_backend.renderers import FastJSONRenderer
+from trustpoints_backend.rows import RowListMixin, RowMapper
+from auth_system.authentication import ClaimsJWTAuthentication
 
 AppUser = get_user_model()
+logger = logging.getLogger(__name__)
 
 # 🚀 Add New App
 class AddNewAppView(generics.CreateAPIView):
@@ -24,35 +37,31 @@ class AddNewAppView(generics.CreateAPIView):
     def perform_create(self, serializer):
         serializer.save()
 
-# Custom Pagination: 10 Apps Per Page
-class AppPagination(PageNumberPagination):
-    page_size = 10  # Default items per page
-    page_size_query_param = "page_size"  # Allow dynamic page size (optional)
-    max_page_size = 50  # Limit max items per page
-
 class GetAllAppsView(generics.ListAPIView):
     serializer_class = AppSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsCustomAdmin]
-    pagination_class = AppPagination
+    pagination_class = AdminPagination
 
     def get_queryset(self):
-        return App.objects.filter(is_deleted=False)
+        return App.objects.filter(is_deleted=False).order_by("id")
 
     def list(self, request, *args, **kwargs):
         response = super().list(request, *args, **kwargs)
-        total_apps = App.objects.filter(is_deleted=False).count()  # Total apps count
-        response.data["total_apps"] = total_apps  # Add total apps count to response
-        return Response(response.data, status=status.HTTP_200_OK)
+        response.data["total_apps"] = response.data["count"]  # kept for existing clients; counted once
+        return response
     
 class AllAppsView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsCustomAdmin]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     def get(self, request):
         apps = App.objects.filter(is_deleted=False)
-        
-        apps_serializer = AppSerializer(apps, many=True)
 
-        return Response(apps_serializer.data, status=status.HTTP_200_OK)
+        rows = RowMapper.for_serializer(AppSerializer)
+
+        return Response(rows.serialize(apps), status=status.HTTP_200_OK)
     
 
 # 🚀 Edit App (Update by ID)
@@ -63,14 +72,14 @@ class EditAppView(generics.RetrieveUpdateAPIView):
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
-        print("Incoming Data:", request.data)  # Debugging
+        logger.debug("Editing app %s with %s", instance.pk, sorted(request.data))
         serializer = self.get_serializer(instance, data=request.data, partial=True)
 
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
         
-        print("Errors:", serializer.errors)  # Log errors
+        logger.info("Rejected edit of app %s: %s", instance.pk, serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 # 🚀 Soft Delete App (Mark as Deleted)
@@ -91,9 +100,10 @@ class DeleteAppView(generics.DestroyAPIView):
 class AdminListView(generics.ListAPIView):
     serializer_class = AdminSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AdminPagination
 
     def get_queryset(self):
-        return AppUser.objects.filter(is_admin=True, is_superuser=False).exclude(id=self.request.user.id)
+        return AppUser.objects.filter(is_admin=True, is_superuser=False).exclude(id=self.request.user.id).order_by("id")
 
 
 class AdminCreateView(generics.CreateAPIView):
@@ -108,21 +118,30 @@ class AdminUpdateView(generics.RetrieveUpdateAPIView):
 
 # Verify task
 
-class AllTasksListView(generics.ListAPIView):
-    serializer_class = TaskSerializer
+class AllTasksListView(RowListMixin, QueryPlanMixin, generics.ListAPIView):
+    """
+    Admin review queue. Paginated by keyset on (created_at, id) and filterable
+    by ?status=, ?app=, ?user=, ?created_after=, ?created_before= and ?flagged=true.
+    """
+    serializer_class = AdminTaskSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsCustomAdmin]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return Task.objects.all()
+        filters = TaskFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        return filters.filter_queryset(Task.objects.all())
     
-class TaskDetailView(generics.RetrieveAPIView):
+class TaskDetailView(QueryPlanMixin, generics.RetrieveAPIView):
     queryset = Task.objects.all()  # Fetch Task objects, not App objects
-    serializer_class = TaskSerializer
-    permission_classes = [IsAuthenticated]
+    serializer_class = AdminTaskSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsCustomAdmin]
 
     def get(self, request, *args, **kwargs):
         task = self.get_object()
-        return Response(TaskSerializer(task).data)
+        return Response(AdminTaskSerializer(task).data)
     
 
 class VerifyTaskView(generics.UpdateAPIView):
@@ -133,21 +152,18 @@ class VerifyTaskView(generics.UpdateAPIView):
     serializer_class = TaskSerializer
 
     def update(self, request, *args, **kwargs):
-        task = get_object_or_404(Task, id=kwargs['task_id'])
+        task = get_object_or_404(
+            Task.objects.select_related("app").only("id", "user_id", "app__points"),
+            id=kwargs['task_id'],
+        )
 
-        if task.status != "pending":
+        # Status flip, ledger entry and points credit happen in one transaction
+        new_points = verify_task(task)
+        if new_points is None:
             return Response({"error": "Task is not pending"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Update task status
-        task.status = "verified"
-        task.save()
-
-        # Add points to the user (directly updating AppUser model)
-        task.user.points += task.app.points  # Add the app's points to user's total
-        task.user.save()
-
         return Response(
-            {"message": "Task verified successfully", "new_points": task.user.points},
+            {"message": "Task verified successfully", "new_points": new_points},
             status=status.HTTP_200_OK
         )
     
@@ -159,13 +175,96 @@ class RejectTaskView(generics.UpdateAPIView):
     serializer_class = TaskSerializer
 
     def update(self, request, *args, **kwargs):
-        task = get_object_or_404(Task, id=kwargs['task_id'])
+        task = get_object_or_404(Task.objects.only("id", "user_id", "app_id"), id=kwargs['task_id'])
 
-        if task.status != "pending":
+        if not reject_task(task):
             return Response({"error": "Task is not pending"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Update task status
-        task.status = "rejected"
-        task.save()
-
         return Response({"message": "Task rejected successfully"}, status=status.HTTP_200_OK)
+
+
+class BulkReviewTasksView(APIView):
+    """
+    Verify or reject up to 500 tasks in one request.
+
+    Body: {"task_ids": [1, 2, 3], "verdict": "verified" | "rejected"}
+    """
+    permission_classes = [IsCustomAdmin]
+
+    def post(self, request):
+        serializer = BulkReviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        task_ids = list(dict.fromkeys(serializer.validated_data["task_ids"]))
+        results = review_tasks(task_ids, serializer.validated_data["verdict"])
+
+        return Response(
+            {"results": [{"task_id": task_id, "result": result} for task_id, result in results.items()]},
+            status=status.HTTP_200_OK
+        )
+
+
+class AppStatsView(APIView):
+    """
+    Dashboard analytics from the daily rollup: totals, one row per day and
+    one row per app for ?start=&end= (dates, default the last 30 days),
+    optionally for one ?app=. Reads only ``AppDailyStats``, never ``Task``.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsCustomAdmin]
+
+    def get(self, request):
+        params = StatsRangeSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        period = params.validated_data
+        rows = AppDailyStats.objects.filter(day__range=(period["start"], period["end"]))
+        if "app" in period:
+            rows = rows.filter(app_id=period["app"])
+        sums = {counter: Sum(counter) for counter in COUNTERS}
+
+        daily = list(rows.values("day").annotate(**sums).order_by("day"))
+        apps = list(
+            rows.values("app_id", "app__name").annotate(**sums).order_by("-submissions", "app_id")
+        )
+        totals = {counter: sum(row[counter] for row in daily) for counter in COUNTERS}
+        return Response({
+            "start": period["start"],
+            "end": period["end"],
+            "totals": totals,
+            "daily": daily,
+            "apps": [{"app_id": row.pop("app_id"), "name": row.pop("app__name"), **row} for row in apps],
+        }, status=status.HTTP_200_OK)
+
+
+class ProfileListView(APIView):
+    """Recent admin request profiles (see ``admin_panel.profiling``), newest first."""
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsCustomAdmin]
+
+    def get(self, request):
+        return Response(list_profiles(), status=status.HTTP_200_OK)
+
+
+class ProfileDetailView(APIView):
+    """
+    One profile. JSON with a pstats text summary (?sort= any pstats key,
+    default cumulative), or the raw pstats file with ?download=1.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsCustomAdmin]
+
+    def get(self, request, profile_id):
+        entry = get_profile(profile_id)
+        if entry is None:
+            return Response({"error": "Profile not found or already evicted"}, status=status.HTTP_404_NOT_FOUND)
+
+        if request.query_params.get("download") == "1":
+            response = HttpResponse(entry["stats"], content_type="application/octet-stream")
+            response["Content-Disposition"] = f'attachment; filename="profile-{profile_id}.prof"'
+            return response
+
+        sort = request.query_params.get("sort", "cumulative")
+        if sort not in pstats.SortKey._value2member_map_:
+            return Response({"error": "Unknown sort key"}, status=status.HTTP_400_BAD_REQUEST)
+        summary = {key: value for key, value in entry.items() if key != "stats"}
+        return Response({**summary, "summary": summarize(entry, sort)}, status=status.HTTP_200_OK)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AuthSystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'auth_system'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registers signal receivers)
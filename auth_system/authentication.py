@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+
+from .tokens import aget_token_version, get_token_version
+
+CLAIMS = ("user_id", "role", "is_admin", "is_active")
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user built from access-token claims. Carries what permission
+    checks read (id, role, is_admin) but has no database row behind it.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token["role"]
+
+    @cached_property
+    def is_admin(self):
+        return bool(self.token["is_admin"])
+
+    @cached_property
+    def is_active(self):
+        return bool(self.token["is_active"])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that skips the per-request user query.
+
+    Meant for read-only endpoints: the user is rebuilt from the token's
+    claims. When JWT_TOKEN_VERSION_CHECK is on, tokens older than the
+    user's token version (bumped by password, role and activation changes)
+    are rejected. Tokens without the claims fall back to the regular
+    database lookup.
+    """
+
+    def get_user(self, validated_token):
+        return self.get_claims_user(validated_token) or super().get_user(validated_token)
+
+    def get_claims_user(self, validated_token):
+        """Returns a ClaimsUser if the token's claims can be trusted, else None."""
+        checks_version = settings.JWT_TOKEN_VERSION_CHECK and "ver" in validated_token
+        version = get_token_version(validated_token["user_id"]) if checks_version else None
+        return self.trusted_claims_user(validated_token, version)
+
+    async def aget_claims_user(self, validated_token):
+        """``get_claims_user()`` for async views."""
+        checks_version = settings.JWT_TOKEN_VERSION_CHECK and "ver" in validated_token
+        version = await aget_token_version(validated_token["user_id"]) if checks_version else None
+        return self.trusted_claims_user(validated_token, version)
+
+    def trusted_claims_user(self, validated_token, version):
+        if version is not None and validated_token["ver"] < version:
+            raise InvalidToken(_("Token has been revoked"))
+        if not all(claim in validated_token for claim in CLAIMS):
+            return None
+        if not validated_token["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return ClaimsUser(validated_token)
@@ -0,0 +1,53 @@
+"""
+Refresh-token revocation.
+
+A revoked token's jti is inserted into the uniquely indexed ``RevokedToken``
+table and mirrored in the cache until the token expires. Checks hit the
+cache first, so replays of recently revoked tokens never reach the
+database. Rotation consumes the old token with a single INSERT: the unique
+jti index makes a concurrent or replayed refresh fail with IntegrityError
+instead of needing a separate SELECT, so refresh cost does not depend on
+how many rows the table holds.
+"""
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken
+
+REVOKED_KEY = "auth_system:revoked:{jti}"
+
+
+def _expiry(token):
+    return datetime.fromtimestamp(token["exp"], tz=timezone.utc)
+
+
+def _remember(token):
+    remaining = (_expiry(token) - datetime.now(tz=timezone.utc)).total_seconds()
+    if remaining > 0:
+        cache.set(REVOKED_KEY.format(jti=token[api_settings.JTI_CLAIM]), True, timeout=int(remaining) + 1)
+
+
+def is_revoked_cached(token):
+    """Cache-only check; True means revoked, False means unknown."""
+    return bool(cache.get(REVOKED_KEY.format(jti=token[api_settings.JTI_CLAIM])))
+
+
+def is_revoked(token):
+    if is_revoked_cached(token):
+        return True
+    return RevokedToken.objects.filter(jti=token[api_settings.JTI_CLAIM]).exists()
+
+
+def revoke(token):
+    """Revokes a refresh token. Returns False if it had already been revoked."""
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=token[api_settings.JTI_CLAIM], expires_at=_expiry(token))
+    except IntegrityError:
+        _remember(token)
+        return False
+    _remember(token)
+    return True
@@ -0,0 +1,94 @@
+"""
+Deployment-tunable password hashers.
+
+The cost parameters are read from settings on every use (PASSWORD_PBKDF2_*,
+PASSWORD_SCRYPT_*, PASSWORD_ARGON2_*), and the preferred algorithm is chosen
+by PASSWORD_HASHER. Django rehashes a password on the next successful login
+whenever its stored hash uses another algorithm or other parameters, so
+changing the policy upgrades (or cheapens) existing hashes transparently.
+
+With PASSWORD_HASHING_CONCURRENCY > 0 at most that many hashes are computed
+at once per process; other logins wait for a slot in their own thread. That
+caps the CPU a login spike can take from the rest of the app. hashlib and
+argon2 release the GIL, so the running hashes still use separate cores.
+"""
+import threading
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+_slots = None
+_slots_lock = threading.Lock()
+_holding = threading.local()
+
+
+def _get_slots():
+    global _slots
+    limit = settings.PASSWORD_HASHING_CONCURRENCY
+    with _slots_lock:
+        if _slots is None or _slots[0] != limit:
+            _slots = (limit, threading.BoundedSemaphore(limit))
+        return _slots[1]
+
+
+def run_hashing(func, *args, **kwargs):
+    """Runs ``func`` once a hashing slot is free, or straight away without a limit."""
+    # verify() calls encode(); the nested call reuses the caller's slot
+    if settings.PASSWORD_HASHING_CONCURRENCY <= 0 or getattr(_holding, "slot", False):
+        return func(*args, **kwargs)
+    with _get_slots():
+        _holding.slot = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _holding.slot = False
+
+
+class LimitedHasherMixin:
+    def encode(self, *args, **kwargs):
+        return run_hashing(super().encode, *args, **kwargs)
+
+    def verify(self, *args, **kwargs):
+        return run_hashing(super().verify, *args, **kwargs)
+
+
+class TunablePBKDF2PasswordHasher(LimitedHasherMixin, PBKDF2PasswordHasher):
+    """Verifies and upgrades Django's default ``pbkdf2_sha256`` hashes."""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunableScryptPasswordHasher(LimitedHasherMixin, ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+
+class TunableArgon2PasswordHasher(LimitedHasherMixin, Argon2PasswordHasher):
+    """Needs the optional ``argon2-cffi`` package; settings only list it when installed."""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
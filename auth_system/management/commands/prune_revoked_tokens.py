@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from auth_system.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = "Deletes revoked refresh tokens that have expired, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = RevokedToken.objects.filter(expires_at__lt=now).order_by("expires_at")
+        total = 0
+        while True:
+            # Short transactions: each batch is one indexed range read and one delete by id
+            ids = list(expired.values_list("id", flat=True)[:options["batch_size"]])
+            if not ids:
+                break
+            total += RevokedToken.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(f"Pruned {total} expired revoked tokens."))
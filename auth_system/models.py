@@ -36,5 +36,49 @@ class AppUser(AbstractUser):
             self.is_admin = True
         super().save(*args, **kwargs)
 
+    # A successful check may rehash the password under the current hashing
+    # policy and save it; the password is unchanged, so the save is flagged
+    # for auth_system.signals not to revoke the user's tokens.
+    def check_password(self, raw_password):
+        self._rehashing = True
+        try:
+            return super().check_password(raw_password)
+        finally:
+            self._rehashing = False
+
+    async def acheck_password(self, raw_password):
+        self._rehashing = True
+        try:
+            return await super().acheck_password(raw_password)
+        finally:
+            self._rehashing = False
+
     def __str__(self):
         return f"{self.username} ({self.role})"
+
+
+class RevokedToken(models.Model):
+    """
+    Refresh tokens that can no longer be used, by jti. Rows are only needed
+    until the token would have expired anyway; prune_revoked_tokens deletes
+    them after that.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class TokenVersion(models.Model):
+    """
+    Per-user counter stamped into access tokens as ``ver``. Bumping it
+    (``auth_system.tokens.bump_token_version``) revokes every access token
+    issued before. Users without a row are at version 0.
+    """
+    user = models.OneToOneField(AppUser, on_delete=models.CASCADE, primary_key=True, related_name="token_version")
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
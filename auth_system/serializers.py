@@ -2,12 +2,17 @@ from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.validators import UniqueValidator
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
+from trustpoints_backend.metrics import TimedSerializerMixin
 from .models import AppUser
+from .blacklist import is_revoked, is_revoked_cached, revoke
+from .tokens import add_user_claims, set_claims
 from django.contrib.auth import get_user_model
 
 
-class AppUserSerializer(serializers.ModelSerializer):
+class AppUserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
 
     class Meta:
@@ -43,9 +48,13 @@ class AppUserSerializer(serializers.ModelSerializer):
         return instance
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         data = super().validate(attrs)
-        user = self.user
+        user = self.user  # Already loaded by authenticate(), no further query
         data.update({
             'user_id': user.id,
             'username': user.username,
@@ -90,23 +99,57 @@ class SimpleRegistrationSerializer(serializers.ModelSerializer):
 User = get_user_model()
 
 class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refreshes with one token decode and one narrow user query. The new
+    tokens get their claims from the user's current row, so role changes
+    reach the claims on the next refresh.
+    """
+
     def validate(self, attrs):
-        data = super().validate(attrs)  # Get the new access token
+        refresh = self.token_class(attrs["refresh"])  # Decode and verify once
+
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            # Consuming the token is the revocation check: a replay fails the unique insert
+            if is_revoked_cached(refresh) or not revoke(refresh):
+                raise InvalidToken("Token is blacklisted")
+        elif is_revoked(refresh):
+            raise InvalidToken("Token is blacklisted")
 
         # Extract user ID from the refresh token
-        refresh = RefreshToken(attrs["refresh"])
         user_id = refresh.payload.get("user_id")
-
-        try:
-            user = User.objects.get(id=user_id)
-            data.update({
-                "user_id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "role": user.role,
-            })
-        except User.DoesNotExist:
+        user = User.objects.filter(id=user_id, is_active=True).values(
+            "id", "username", "email", "role", "is_admin", "is_active"
+        ).first()
+        if user is None:
             raise serializers.ValidationError("User not found")
 
+        set_claims(refresh, user["id"], user["role"], user["is_admin"], user["is_active"])
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+
+        data.update({
+            "user_id": user["id"],
+            "username": user["username"],
+            "email": user["email"],
+            "role": user["role"],
+        })
         return data
 
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        try:
+            attrs["refresh"] = RefreshToken(attrs["refresh"])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        return attrs
+
+    def save(self):
+        revoke(self.validated_data["refresh"])
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from .models import AppUser
+from .tokens import bump_token_version
+
+# Fields whose change must revoke the access tokens issued before
+AUTH_FIELDS = ("password", "role", "is_admin", "is_active", "is_superuser")
+
+
+@receiver(pre_save, sender=AppUser)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    """Notes whether this save changes what the user's token claims vouch for."""
+    instance._auth_changed = False
+    if instance._state.adding or (update_fields is not None and not set(update_fields) & set(AUTH_FIELDS)):
+        return
+    if getattr(instance, "_rehashing", False) and set(update_fields or ()) == {"password"}:
+        # check_password() upgrading the hash of the same password
+        return
+    stored = AppUser.objects.filter(pk=instance.pk).values(*AUTH_FIELDS).first()
+    instance._auth_changed = stored is not None and any(
+        stored[field] != getattr(instance, field) for field in AUTH_FIELDS
+    )
+
+
+@receiver(post_save, sender=AppUser)
+def user_saved(sender, instance, created, **kwargs):
+    """Tokens issued before a password, role or activation change are revoked.
+
+    Queryset ``update()`` skips these signals; call ``bump_token_version``
+    after updating those fields that way.
+    """
+    if getattr(instance, "_auth_changed", False):
+        bump_token_version(instance.id)
@@ -1,3 +1,259 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+import threading
+from unittest import mock
+
+from django.contrib.auth.hashers import PBKDF2SHA1PasswordHasher, identify_hasher
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import hashers
+from .models import AppUser, RevokedToken
+from .tokens import tokens_for_user
+
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = AppUser.objects.create_user(username="alice", email="alice@example.com", password="pass12345")
+        self.admin = AppUser.objects.create_user(username="boss", password="pass12345", role="admin", is_admin=True)
+        self.client = APIClient()
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_login_tokens_carry_claims(self):
+        response = self.client.post("/auth/login/", {"username": "alice", "password": "pass12345"})
+        access = AccessToken(response.json()["access"])
+        self.assertEqual((access["role"], access["is_admin"]), ("user", False))
+
+        response = self.client.post("/auth/admin/login/", {"username": "boss", "password": "pass12345"})
+        access = AccessToken(response.json()["access"])
+        self.assertEqual((access["role"], access["is_admin"], access["email"]), ("admin", True, ""))
+
+    def test_read_only_views_skip_user_query(self):
+        self.authenticate(tokens_for_user(self.user).access_token)
+        with self.assertNumQueries(1):
+            response = self.client.get("/user_panel/tasks/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_permission_from_claims(self):
+        self.authenticate(tokens_for_user(self.admin).access_token)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/admin_panel/tasks/").status_code, 200)
+
+        self.authenticate(tokens_for_user(self.user).access_token)
+        self.assertEqual(self.client.get("/admin_panel/tasks/").status_code, 403)
+
+    def test_tokens_without_claims_use_database(self):
+        self.authenticate(RefreshToken.for_user(self.user).access_token)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get("/user_panel/tasks/").status_code, 200)
+
+    def test_role_change_revokes_tokens(self):
+        self.authenticate(tokens_for_user(self.admin).access_token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.role, self.admin.is_admin = "user", False
+            self.admin.save()
+
+        self.assertEqual(self.client.get("/admin_panel/tasks/").status_code, 401)
+        self.authenticate(tokens_for_user(self.admin).access_token)
+        self.assertEqual(self.client.get("/admin_panel/tasks/").status_code, 403)
+
+    def test_revocation_survives_cache_loss(self):
+        token = tokens_for_user(self.user).access_token
+        self.user.set_password("new-pass-123")
+        self.user.save()
+        cache.clear()
+
+        self.authenticate(token)
+        self.assertEqual(self.client.get("/user_panel/tasks/").status_code, 401)
+
+    def test_other_changes_keep_tokens(self):
+        self.authenticate(tokens_for_user(self.user).access_token)
+        self.user.email = "new@example.com"
+        self.user.save()
+        self.assertEqual(self.client.get("/user_panel/tasks/").status_code, 200)
+
+    def test_inactive_users_are_rejected(self):
+        token = tokens_for_user(self.user).access_token
+        self.user.is_active = False
+        self.user.save()
+
+        self.authenticate(token)
+        self.assertEqual(self.client.get("/user_panel/tasks/").status_code, 401)
+        self.authenticate(tokens_for_user(self.user).access_token)  # stamped is_active=False
+        self.assertEqual(self.client.get("/user_panel/tasks/").status_code, 401)
+
+    @override_settings(JWT_TOKEN_VERSION_CHECK=False)
+    def test_version_check_can_be_disabled(self):
+        self.authenticate(tokens_for_user(self.admin).access_token)
+        AppUser.objects.filter(id=self.admin.id).update(is_admin=False)
+        self.admin.save()
+        self.assertEqual(self.client.get("/admin_panel/tasks/").status_code, 200)
+
+
+class RefreshTokenRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = AppUser.objects.create(username="alice", email="alice@example.com")
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post("/auth/token/refresh/", {"refresh": str(token)})
+
+    def test_rotation_revokes_old_token(self):
+        token = tokens_for_user(self.user)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["username"], "alice")
+        self.assertNotEqual(body["refresh"], str(token))
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(body["refresh"]).status_code, 200)
+
+    def test_replay_rejected_without_cache(self):
+        token = tokens_for_user(self.user)
+        self.refresh(token)
+        cache.clear()
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_refresh_makes_one_query_and_one_insert(self):
+        token = tokens_for_user(self.user)
+        with self.assertNumQueries(4):  # savepoint, INSERT revoked jti, release, SELECT user columns
+            response = self.refresh(token)
+        self.assertEqual(response.json()["email"], "alice@example.com")
+
+    def test_refresh_restamps_claims(self):
+        token = tokens_for_user(self.user)
+        AppUser.objects.filter(id=self.user.id).update(role="admin", is_admin=True)
+        access = AccessToken(self.refresh(token).json()["access"])
+        self.assertEqual((access["role"], access["is_admin"]), ("admin", True))
+
+    def test_refresh_rejects_inactive_user(self):
+        token = tokens_for_user(self.user)
+        AppUser.objects.filter(id=self.user.id).update(is_active=False)
+        self.assertEqual(self.refresh(token).status_code, 400)
+
+    def test_cached_replay_skips_database(self):
+        token = tokens_for_user(self.user)
+        self.refresh(token)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.refresh(token).status_code, 401)
+
+    def test_logout(self):
+        token = tokens_for_user(self.user)
+        self.assertEqual(self.client.post("/auth/logout/", {"refresh": str(token)}).status_code, 205)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.client.post("/auth/logout/", {"refresh": "garbage"}).status_code, 401)
+
+    def test_prune_deletes_expired_rows_in_batches(self):
+        now = timezone.now()
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=f"old{i}", expires_at=now - timedelta(days=1)) for i in range(5)]
+            + [RevokedToken(jti="live", expires_at=now + timedelta(days=1))]
+        )
+        out = StringIO()
+        call_command("prune_revoked_tokens", batch_size=2, stdout=out)
+        self.assertIn("Pruned 5", out.getvalue())
+        self.assertEqual(list(RevokedToken.objects.values_list("jti", flat=True)), ["live"])
+
+
+TUNABLE_HASHERS = [
+    "auth_system.hashers.TunablePBKDF2PasswordHasher",
+    "auth_system.hashers.TunableScryptPasswordHasher",
+]
+
+
+@override_settings(PASSWORD_HASHERS=TUNABLE_HASHERS, PASSWORD_PBKDF2_ITERATIONS=1000)
+class PasswordHashingPolicyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = AppUser.objects.create_user(username="alice", password="pass12345")
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post("/auth/login/", {"username": "alice", "password": "pass12345"})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        return identify_hasher(self.user.password).decode(self.user.password)
+
+    def test_iterations_follow_settings(self):
+        self.assertEqual(self.login()["iterations"], 1000)
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login()["iterations"], 2000)
+
+    def test_rehash_on_login_keeps_tokens(self):
+        token = tokens_for_user(self.user).access_token
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login()["iterations"], 2000)
+        response = self.client.get("/user_panel/tasks/summary/", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+
+        # A real password change still revokes them
+        self.user.set_password("new-pass-456")
+        self.user.save()
+        response = self.client.get("/user_panel/tasks/summary/", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_changing_algorithm_rehashes_on_login(self):
+        with self.settings(PASSWORD_HASHERS=TUNABLE_HASHERS[::-1], PASSWORD_SCRYPT_WORK_FACTOR=2 ** 10):
+            decoded = self.login()
+        self.assertEqual((decoded["algorithm"], decoded["work_factor"]), ("scrypt", 2 ** 10))
+        # Back on PBKDF2, the scrypt hash still verifies and is converted
+        self.assertEqual(self.login()["algorithm"], "pbkdf2_sha256")
+
+    @override_settings(PASSWORD_HASHING_CONCURRENCY=1)
+    def test_hashing_concurrency_is_capped(self):
+        running, peak, lock = [0], [0], threading.Lock()
+        original = hashers.PBKDF2PasswordHasher.encode
+
+        def encode(hasher, *args, **kwargs):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            try:
+                return original(hasher, *args, **kwargs)
+            finally:
+                with lock:
+                    running[0] -= 1
+
+        hasher = hashers.TunablePBKDF2PasswordHasher()
+        with mock.patch.object(hashers.PBKDF2PasswordHasher, "encode", encode):
+            # verify() hashes through encode() again; the nested call reuses the slot
+            encoded = hasher.encode("pass12345", hasher.salt())
+            threads = [threading.Thread(target=hasher.verify, args=("pass12345", encoded)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(peak[0], 1)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class PasswordHasherSettingsTests(TestCase):
+    def test_django_defaults_verify_after_the_tunable_hashers(self):
+        from django.conf import settings
+
+        self.assertEqual(settings.PASSWORD_HASHERS[0], "auth_system.hashers.TunablePBKDF2PasswordHasher")
+        self.assertIn("django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher", settings.PASSWORD_HASHERS)
+        # The tunable subclass, not Django's own class, handles its algorithm
+        self.assertNotIn("django.contrib.auth.hashers.PBKDF2PasswordHasher", settings.PASSWORD_HASHERS)
+
+        user = AppUser.objects.create(username="alice")
+        AppUser.objects.filter(id=user.id).update(
+            password=PBKDF2SHA1PasswordHasher().encode("pass12345", "salt1234", iterations=1000)
+        )
+        response = APIClient().post("/auth/login/", {"username": "alice", "password": "pass12345"})
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, "pbkdf2_sha256")
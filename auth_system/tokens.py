@@ -0,0 +1,75 @@
+"""
+JWT issuing helpers.
+
+Tokens carry the claims ``ClaimsJWTAuthentication`` needs to authorize a
+request without loading the user: ``role``, ``is_admin``, ``is_active`` and
+``ver``, the user's token version. Changing a user's password, role, admin
+flag or active flag bumps the version (see ``auth_system.signals``), which
+revokes the access tokens issued before.
+
+Versions are stored in ``TokenVersion``; the cache only saves the lookup,
+so losing a cache entry can't make old tokens valid again.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from trustpoints_backend.db_router import primary_reads
+
+from .models import TokenVersion
+
+TOKEN_VERSION_KEY = "auth_system:token_version:{user_id}"
+
+
+def get_token_version(user_id):
+    key = TOKEN_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Authentication runs inside replica_reads(); a lagging replica would
+        # cache a revoked version for the whole timeout
+        with primary_reads():
+            version = TokenVersion.objects.filter(user_id=user_id).values_list("version", flat=True).first() or 0
+            cache.set(key, version, timeout=settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+async def aget_token_version(user_id):
+    key = TOKEN_VERSION_KEY.format(user_id=user_id)
+    version = await cache.aget(key)
+    if version is None:
+        with primary_reads():
+            version = await TokenVersion.objects.filter(user_id=user_id).values_list("version", flat=True).afirst() or 0
+            await cache.aset(key, version, timeout=settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def bump_token_version(user_id):
+    """Revokes the user's access tokens issued so far."""
+    if not TokenVersion.objects.filter(user_id=user_id).update(version=F("version") + 1):
+        _, created = TokenVersion.objects.get_or_create(user_id=user_id, defaults={"version": 1})
+        if not created:  # created concurrently
+            TokenVersion.objects.filter(user_id=user_id).update(version=F("version") + 1)
+
+    key = TOKEN_VERSION_KEY.format(user_id=user_id)
+    cache.delete(key)
+    # Readers outside this transaction may have cached the old version meanwhile
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def set_claims(token, user_id, role, is_admin, is_active):
+    token["role"] = role
+    token["is_admin"] = is_admin
+    token["is_active"] = is_active
+    token["ver"] = get_token_version(user_id)
+    return token
+
+
+def add_user_claims(token, user):
+    return set_claims(token, user.id, user.role, user.is_admin, user.is_active)
+
+
+def tokens_for_user(user):
+    """``RefreshToken.for_user`` with the authorization claims added; access tokens inherit them."""
+    return add_user_claims(RefreshToken.for_user(user), user)
@@ -10,6 +10,7 @@ urlpatterns = [
 
     path('token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('token/verify/', TokenVerifyView.as_view(), name='token_view'),
+    path('logout/', LogoutAPIView.as_view(), name='logout'),
 
     path('admin/login/', AdminLoginAPIView.as_view(), name='admin_login'),
     path("admin/edit/<int:admin_id>/", EditAdminAPIView.as_view(), name="edit-admin"),
@@ -2,15 +2,16 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import authenticate
 
+from trustpoints_backend.db_router import ReplicaReadMixin
 from .models import AppUser
-from .serializers import AppUserSerializer, SimpleRegistrationSerializer, CustomTokenObtainPairSerializer, CustomTokenRefreshSerializer
+from .tokens import tokens_for_user
+from .serializers import AppUserSerializer, SimpleRegistrationSerializer, CustomTokenObtainPairSerializer, CustomTokenRefreshSerializer, LogoutSerializer
 
-class GetUserAPIView(APIView):
+class GetUserAPIView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -25,7 +26,7 @@ class RegisterAPIView(APIView):
         serializer = SimpleRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = tokens_for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -65,7 +66,7 @@ class EditUserAPIView(APIView):
 # Admin Logic
 
 
-class GetAdminAPIView(APIView):
+class GetAdminAPIView(ReplicaReadMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -89,11 +90,9 @@ class AdminLoginAPIView(APIView):
         user = authenticate(username=username, password=password)
 
         if user and user.is_admin:  # Check if the user is an admin
-            refresh = RefreshToken.for_user(user)
+            refresh = tokens_for_user(user)  # carries role, is_admin and user_id
             access_token = refresh.access_token
 
-            access_token["role"] = user.role
-            access_token["user_id"] = user.id
             access_token["email"] = user.email
 
             return Response(
@@ -135,4 +134,12 @@ class CustomTokenRefreshView(TokenRefreshView):
     serializer_class = CustomTokenRefreshSerializer
 
 
+class LogoutAPIView(APIView):
+    """Revokes the given refresh token."""
+    permission_classes = [AllowAny]
 
+    def post(self, request):
+        serializer = LogoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(status=status.HTTP_205_RESET_CONTENT)
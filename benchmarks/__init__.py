@@ -0,0 +1,7 @@
+"""
+Benchmark scripts. Run from the project root, e.g.::
+
+    python -m benchmarks.bench_auth --iterations 200
+
+Each script runs against a throwaway test database, never the configured one.
+"""
@@ -0,0 +1,110 @@
+"""
+Read endpoints served by the DRF views versus the native async views.
+
+    python -m benchmarks.bench_asgi [--iterations N] [--concurrency C] [--output results.json]
+
+Three setups are measured for each endpoint:
+
+    wsgi        DRF views, Client calls from C threads (one request per thread)
+    asgi-sync   DRF views behind AsyncClient, C concurrent requests on one loop
+    asgi-async  user_panel.async_views behind AsyncClient, same concurrency
+"""
+import argparse
+import asyncio
+import time
+import types
+
+from benchmarks.common import report, run_concurrent, setup_django, summarize, test_database
+
+
+def urlconf(views):
+    """URLconf module routing the benchmarked paths to ``views``."""
+    from django.urls import path
+
+    module = types.ModuleType("bench_urls")
+    module.urlpatterns = [
+        path("apps/", views.AppListView.as_view()),
+        path("tasks/", views.UserTasksListView.as_view()),
+        path("task/<int:pk>/", views.TaskDetailView.as_view()),
+    ]
+    return module
+
+
+def run_async(name, request, iterations, concurrency, warmup=5):
+    """Awaits ``request(i)`` with up to ``concurrency`` requests in flight."""
+
+    async def main():
+        for i in range(warmup):
+            await request(i)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed(i):
+            async with semaphore:
+                t0 = time.perf_counter()
+                await request(i)
+                return time.perf_counter() - t0
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(timed(i) for i in range(warmup, warmup + iterations)))
+        return summarize(f"{name} x{concurrency}", latencies, time.perf_counter() - started)
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=50, help="tasks owned by the benchmark user")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.test import AsyncClient, Client
+        from django.test.utils import override_settings
+
+        from admin_panel.models import App
+        from auth_system.models import AppUser
+        from auth_system.tokens import tokens_for_user
+        from user_panel import async_views, views
+        from user_panel.models import Task
+
+        user = AppUser.objects.create(username="bench", email="bench@example.com")
+        for i in range(args.tasks):
+            app = App.objects.create(
+                name=f"App{i}", app_link=f"com.example.app{i}", app_category="Social",
+                sub_category="Chat", points=10, app_image=f"apps/app{i}",
+            )
+            Task.objects.create(user=user, app=app, screenshot=f"shots/{i}")
+        task_id = Task.objects.values_list("id", flat=True).first()
+        headers = {"Authorization": f"Bearer {tokens_for_user(user).access_token}"}
+
+        sync_urls = urlconf(views)
+        async_urls = urlconf(types.SimpleNamespace(
+            AppListView=async_views.AsyncAppListView,
+            UserTasksListView=async_views.AsyncUserTasksListView,
+            TaskDetailView=async_views.AsyncTaskDetailView,
+        ))
+
+        results = []
+        for path in ("/apps/", "/tasks/", f"/task/{task_id}/"):
+            def get(i):
+                response = Client(headers=headers).get(path)
+                assert response.status_code == 200, response.content
+
+            async def aget(i):
+                response = await AsyncClient().get(path, headers=headers)
+                assert response.status_code == 200, response.content
+
+            with override_settings(ROOT_URLCONF=sync_urls):
+                results.append(run_concurrent(f"wsgi {path}", get, args.iterations, args.concurrency))
+                results.append(run_async(f"asgi-sync {path}", aget, args.iterations, args.concurrency))
+            with override_settings(ROOT_URLCONF=async_urls):
+                results.append(run_async(f"asgi-async {path}", aget, args.iterations, args.concurrency))
+    report(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Login and token-refresh throughput.
+
+    python -m benchmarks.bench_auth [--iterations N] [--case login|refresh] [--output results.json]
+
+Password-hashing policies can be compared with repeated --policy options;
+login is then measured once per policy:
+
+    python -m benchmarks.bench_auth --case login --policy pbkdf2:870000 \
+        --policy pbkdf2:300000 --policy scrypt:16384 --concurrency 4 --hashing-limit 4
+
+Policy formats: pbkdf2:ITERATIONS, scrypt:WORK_FACTOR, argon2:TIME_COST:MEMORY_KB.
+"""
+import argparse
+
+from benchmarks.common import report, run, run_concurrent, setup_django, test_database
+
+HASHERS = {
+    "pbkdf2": "auth_system.hashers.TunablePBKDF2PasswordHasher",
+    "scrypt": "auth_system.hashers.TunableScryptPasswordHasher",
+    "argon2": "auth_system.hashers.TunableArgon2PasswordHasher",
+}
+
+
+def policy_settings(policy):
+    name, *params = policy.split(":")
+    overrides = {"PASSWORD_HASHERS": [HASHERS[name]] + [h for n, h in HASHERS.items() if n != name]}
+    if name == "pbkdf2" and params:
+        overrides["PASSWORD_PBKDF2_ITERATIONS"] = int(params[0])
+    elif name == "scrypt" and params:
+        overrides["PASSWORD_SCRYPT_WORK_FACTOR"] = int(params[0])
+    elif name == "argon2" and params:
+        overrides["PASSWORD_ARGON2_TIME_COST"] = int(params[0])
+        if len(params) > 1:
+            overrides["PASSWORD_ARGON2_MEMORY_COST"] = int(params[1])
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--case", action="append", choices=["login", "refresh"], help="default: all")
+    parser.add_argument("--policy", action="append", help="password hashing policy, e.g. pbkdf2:600000")
+    parser.add_argument("--concurrency", type=int, default=1, help="client threads for login")
+    parser.add_argument("--hashing-limit", type=int, default=0, help="PASSWORD_HASHING_CONCURRENCY")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.test import Client
+        from django.test.utils import override_settings
+
+        from auth_system.models import AppUser
+        from auth_system.tokens import tokens_for_user
+
+        user = AppUser.objects.create_user(username="bench", email="bench@example.com", password="bench-pass-123")
+        client = Client()
+
+        def login(i):
+            response = Client().post("/auth/login/", {"username": "bench", "password": "bench-pass-123"})
+            assert response.status_code == 200, response.content
+
+        def measure_login(name):
+            if args.concurrency > 1:
+                return run_concurrent(name, login, args.iterations, args.concurrency)
+            return run(name, login, args.iterations)
+
+        # Rotation consumes each refresh token, so every request needs its own
+        tokens = [str(tokens_for_user(user)) for _ in range(args.iterations + 5)]
+
+        def refresh(i):
+            response = client.post("/auth/token/refresh/", {"refresh": tokens[i]})
+            assert response.status_code == 200, response.content
+
+        cases = args.case or ["login", "refresh"]
+        results = []
+        if "login" in cases:
+            for policy in args.policy or [None]:
+                overrides = policy_settings(policy) if policy else {}
+                with override_settings(PASSWORD_HASHING_CONCURRENCY=args.hashing_limit, **overrides):
+                    user.set_password("bench-pass-123")
+                    user.save(update_fields=["password"])
+                    results.append(measure_login(f"login {policy}" if policy else "login"))
+        if "refresh" in cases:
+            results.append(run("token refresh", refresh, args.iterations))
+    report(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+End-to-end latency of the main API routes.
+
+    python -m benchmarks.bench_routes [--iterations N] [--case NAME ...] [--output results.json]
+                                      [--baseline previous.json]
+
+Requests go through the real URL routes, middleware and JWT authentication.
+By default a throwaway test database is seeded with ``manage.py seed_data``
+(sizes set by --users/--apps/--tasks); --existing-db runs against the
+configured database instead, e.g. after seeding it with production-like
+volumes:
+
+    python manage.py seed_data --users 1000000 --apps 5000 --tasks 20000000
+    python -m benchmarks.bench_routes --existing-db --output after.json --baseline before.json
+
+Cases: apps, my-tasks, admin-tasks, login, verify.
+"""
+import argparse
+import json
+from contextlib import nullcontext
+from io import StringIO
+from pathlib import Path
+
+from benchmarks.common import report, run, setup_django, test_database
+
+CASES = ["apps", "my-tasks", "admin-tasks", "login", "verify"]
+
+
+def compare(results, baseline_path, threshold=0.10):
+    """Prints the p95 change against a previous run; regressions beyond ``threshold`` are marked."""
+    baseline = {result["name"]: result for result in json.loads(Path(baseline_path).read_text())}
+    for result in results:
+        previous = baseline.get(result["name"])
+        if not previous or not previous["p95_ms"]:
+            continue
+        change = result["p95_ms"] / previous["p95_ms"] - 1
+        marker = "  REGRESSION" if change > threshold else ""
+        print(f"{result['name']:<40} p95 {previous['p95_ms']:>9.3f} -> {result['p95_ms']:>9.3f} ms  {change:+.1%}{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--case", action="append", choices=CASES, help="default: all")
+    parser.add_argument("--existing-db", action="store_true", help="use the configured database as seeded")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--apps", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--prefix", default="seed")
+    parser.add_argument("--password", default="seed-pass-123")
+    parser.add_argument("--output")
+    parser.add_argument("--baseline", help="JSON output of an earlier run to compare against")
+    args = parser.parse_args()
+
+    setup_django()
+    with nullcontext() if args.existing_db else test_database():
+        from django.core.management import call_command
+        from django.db.models import Count
+        from django.test import Client
+
+        from auth_system.models import AppUser
+        from auth_system.tokens import tokens_for_user
+        from user_panel.models import Task
+
+        if not args.existing_db:
+            call_command(
+                "seed_data", users=args.users, apps=args.apps, tasks=args.tasks,
+                prefix=args.prefix, password=args.password, stdout=StringIO(),
+            )
+
+        # The busiest user makes the task list case the expensive one
+        user_id = (
+            Task.objects.values("user_id").annotate(total=Count("id")).order_by("-total")
+            .values_list("user_id", flat=True).first()
+        )
+        user = AppUser.objects.get(id=user_id)
+        admin, _ = AppUser.objects.get_or_create(
+            username=f"{args.prefix}-bench-admin", defaults={"role": "admin", "is_admin": True},
+        )
+        user_client = Client(headers={"Authorization": f"Bearer {tokens_for_user(user).access_token}"})
+        admin_client = Client(headers={"Authorization": f"Bearer {tokens_for_user(admin).access_token}"})
+        pending = list(Task.objects.filter(status="pending").values_list("id", flat=True)[:args.iterations + 5])
+
+        def get(client, path):
+            def request(i):
+                response = client.get(path)
+                assert response.status_code == 200, response.content
+            return request
+
+        def login(i):
+            response = Client().post("/auth/login/", {"username": user.username, "password": args.password})
+            assert response.status_code == 200, response.content
+
+        def verify(i):
+            # Each iteration verifies a different pending task
+            response = admin_client.put(f"/admin_panel/tasks/{pending[i]}/verify/")
+            assert response.status_code == 200, response.content
+
+        requests = {
+            "apps": ("GET /user_panel/apps/", get(user_client, "/user_panel/apps/")),
+            "my-tasks": ("GET /user_panel/tasks/", get(user_client, "/user_panel/tasks/")),
+            "admin-tasks": ("GET /admin_panel/tasks/", get(admin_client, "/admin_panel/tasks/?status=pending")),
+            "login": ("POST /auth/login/", login),
+            "verify": ("PUT /admin_panel/tasks/<id>/verify/", verify),
+        }
+        results = []
+        for case in args.case or CASES:
+            if case == "verify" and len(pending) < args.iterations + 5:
+                print(f"Skipping verify: only {len(pending)} pending tasks")
+                continue
+            name, request = requests[case]
+            results.append(run(name, request, args.iterations))
+
+    report(results, args.output)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
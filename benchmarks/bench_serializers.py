@@ -0,0 +1,108 @@
+"""
+Per-row CPU cost of list serialization: DRF serializers vs the row fast path.
+
+    python -m benchmarks.bench_serializers [--rows N] [--iterations N] [--output results.json]
+
+For each list payload the benchmark measures CPU time per row of:
+
+    fetch+render  query, serialize and render to JSON bytes
+    render        serialize and render rows already fetched
+
+once through ``Serializer(..., many=True)`` + ``JSONRenderer`` (the old
+path) and once through ``RowMapper`` + ``FastJSONRenderer``. Both outputs
+are checked to be identical before timing. A throwaway test database is
+seeded with ``manage.py seed_data``.
+"""
+import argparse
+import json
+import time
+from io import StringIO
+from pathlib import Path
+
+from benchmarks.common import setup_django, test_database
+
+
+def cpu_per_row(func, rows, iterations):
+    """Best-of CPU microseconds per row of ``func()``."""
+    func()
+    best = float("inf")
+    for _ in range(iterations):
+        started = time.process_time()
+        func()
+        best = min(best, time.process_time() - started)
+    return best / rows * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="tasks per task list")
+    parser.add_argument("--apps", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        from django.core.management import call_command
+        from rest_framework.renderers import JSONRenderer
+
+        from admin_panel.models import App
+        from admin_panel.serializers import AdminTaskSerializer, AppSerializer as AdminAppSerializer
+        from trustpoints_backend.query_plan import apply_query_plan
+        from trustpoints_backend.renderers import FastJSONRenderer
+        from trustpoints_backend.rows import RowMapper
+        from user_panel.models import Task
+        from user_panel.serializers import AppSerializer, TaskSerializer
+
+        call_command(
+            "seed_data", users=max(10, args.rows // 50), apps=args.apps, tasks=args.rows,
+            stdout=StringIO(),
+        )
+        cases = [
+            ("apps", AppSerializer, App.objects.filter(is_deleted=False)),
+            ("admin-apps", AdminAppSerializer, App.objects.filter(is_deleted=False)),
+            ("tasks", TaskSerializer, Task.objects.order_by("id")),
+            ("admin-tasks", AdminTaskSerializer, Task.objects.order_by("id")),
+        ]
+
+        results = []
+        for name, serializer_class, queryset in cases:
+            mapper = RowMapper.for_serializer(serializer_class)
+            instances = list(apply_query_plan(queryset, serializer_class))
+            rows = list(mapper.values(queryset))
+            count = len(rows)
+
+            def serializer_path(objects=None):
+                objects = apply_query_plan(queryset, serializer_class) if objects is None else objects
+                return JSONRenderer().render(serializer_class(objects, many=True).data)
+
+            def row_path(fetched=None):
+                fetched = mapper.values(queryset) if fetched is None else fetched
+                return FastJSONRenderer().render(mapper.to_representation(fetched))
+
+            if serializer_path() != row_path():
+                raise SystemExit(f"{name}: row output differs from the serializer output")
+
+            result = {
+                "name": name,
+                "rows": count,
+                "serializer_us_per_row": round(cpu_per_row(serializer_path, count, args.iterations), 3),
+                "rows_us_per_row": round(cpu_per_row(row_path, count, args.iterations), 3),
+                "serializer_render_us_per_row": round(
+                    cpu_per_row(lambda: serializer_path(instances), count, args.iterations), 3
+                ),
+                "rows_render_us_per_row": round(cpu_per_row(lambda: row_path(rows), count, args.iterations), 3),
+            }
+            results.append(result)
+            print(
+                f"{name:<12} {count:>6} rows  fetch+render {result['serializer_us_per_row']:>8.2f} -> "
+                f"{result['rows_us_per_row']:>7.2f} us/row  render {result['serializer_render_us_per_row']:>8.2f} -> "
+                f"{result['rows_render_us_per_row']:>7.2f} us/row"
+            )
+
+        if args.output:
+            Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
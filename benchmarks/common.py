@@ -0,0 +1,105 @@
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "trustpoints_backend.settings")
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Creates a fresh test database for the duration of the block."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name, latencies, elapsed, queries=None):
+    """Latency percentiles in ms and throughput for one benchmark case."""
+    result = {
+        "name": name,
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+    }
+    if queries is not None:
+        result["queries_per_request"] = round(queries / len(latencies), 2)
+    return result
+
+
+def run(name, request, iterations, warmup=5):
+    """Calls ``request(i)`` sequentially and summarizes latency and DB queries."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for i in range(warmup):
+        request(i)
+
+    latencies = []
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for i in range(warmup, warmup + iterations):
+            t0 = time.perf_counter()
+            request(i)
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+    return summarize(name, latencies, elapsed, len(queries))
+
+
+def run_concurrent(name, request, iterations, concurrency, warmup=5):
+    """Calls ``request(i)`` from ``concurrency`` threads; queries are not counted."""
+    from django.db import connections
+
+    for i in range(warmup):
+        request(i)
+
+    def timed(i):
+        t0 = time.perf_counter()
+        try:
+            request(i)
+        finally:
+            connections.close_all()
+        return time.perf_counter() - t0
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, range(warmup, warmup + iterations)))
+    return summarize(f"{name} x{concurrency}", latencies, time.perf_counter() - started)
+
+
+def report(results, output=None):
+    for result in results:
+        print(
+            f"{result['name']:<40} p50 {result['p50_ms']:>9.3f} ms  p95 {result['p95_ms']:>9.3f} ms  "
+            f"p99 {result['p99_ms']:>9.3f} ms  {result['throughput_rps'] or 0:>8.1f} req/s  "
+            f"{result.get('queries_per_request', '-')} q/req"
+        )
+    if output:
+        Path(output).write_text(json.dumps(results, indent=2))
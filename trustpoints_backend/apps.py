@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class TrustpointsBackendConfig(AppConfig):
+    name = 'trustpoints_backend'
+
+    def ready(self):
+        from . import checks  # noqa: F401 (registers the system checks)
+        from .metrics import install_query_recorder
+
+        # Slow-query log and per-request query stats cover every connection
+        install_query_recorder()
@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'trustpoints_backend.settings')
 
+# ASGI profile: native async read views. Serve with e.g.
+#   uvicorn trustpoints_backend.asgi:application --workers 4
+os.environ.setdefault('ASYNC_VIEWS', 'true')
+
 application = get_asgi_application()
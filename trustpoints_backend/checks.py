@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+PER_PROCESS_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Cross-worker state lives in the default cache, so it can't be per process."""
+    if settings.CACHES["default"]["BACKEND"] in PER_PROCESS_CACHES:
+        return [Error(
+            "The default cache is local to each process.",
+            hint="Set CACHE_URL to a shared cache, e.g. redis://host:6379/0.",
+            id="trustpoints_backend.E001",
+        )]
+    return []
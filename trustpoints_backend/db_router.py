@@ -0,0 +1,71 @@
+"""
+Read replica routing.
+
+Every database alias other than ``default`` is treated as a replica of it
+(see the postgres profile in settings). Reads go to the primary unless the
+code runs inside ``replica_reads()``, which read-only views enter through
+``ReplicaReadMixin``. Keeping replicas opt-in means a request that writes
+and then reads back (submit, verify) never sees replication lag.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_use_replicas = ContextVar("use_replicas", default=False)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != "default"]
+
+
+@contextmanager
+def replica_reads():
+    """Routes ORM reads in this block (and its async tasks) to a replica."""
+    token = _use_replicas.set(True)
+    try:
+        yield
+    finally:
+        _use_replicas.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """
+    Routes reads back to the primary inside ``replica_reads()``, for reads
+    whose result is written or cached (a lagging replica would persist
+    stale data).
+    """
+    token = _use_replicas.set(False)
+    try:
+        yield
+    finally:
+        _use_replicas.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replicas.get():
+            replicas = replica_aliases()
+            if replicas:
+                return random.choice(replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, so rows from either can be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaReadMixin:
+    """View mixin for read-only endpoints: their queries go to a replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
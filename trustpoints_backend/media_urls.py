@@ -0,0 +1,53 @@
+"""
+Memoized Cloudinary URL building.
+
+``cloudinary.utils.cloudinary_url`` re-derives the delivery URL (and the
+signature, for signed URLs) every time it is called, which list endpoints
+used to do once per row. URLs depend only on the public id and the
+transformation options, so they are memoized per ``(public_id, options)``
+in a bounded LRU cache. Options (including nested transformation dicts and
+chains) are keyed by their canonical JSON.
+"""
+import json
+from functools import lru_cache
+
+import cloudinary.utils
+from cloudinary import CloudinaryResource
+from django.conf import settings
+
+
+@lru_cache(maxsize=settings.MEDIA_URL_CACHE_SIZE)
+def _build_url(public_id, options):
+    return cloudinary.utils.cloudinary_url(public_id, **json.loads(options))[0]
+
+
+def build_url(public_id, **options):
+    """Memoized ``cloudinary.utils.cloudinary_url(public_id, **options)[0]``."""
+    try:
+        key = json.dumps(options, sort_keys=True)
+    except TypeError:
+        # Options that aren't plain data can't be keyed; build the URL uncached
+        return cloudinary.utils.cloudinary_url(public_id, **options)[0]
+    return _build_url(public_id, key)
+
+
+def resource_url(resource, **options):
+    """
+    Memoized equivalent of ``CloudinaryResource.url`` (what ``ImageField``
+    and ``.url`` return for a ``CloudinaryField`` value). Returns None for
+    empty values and for files that have not been uploaded yet.
+    """
+    if not isinstance(resource, CloudinaryResource) or not resource.public_id:
+        return None
+    combined = dict(
+        format=resource.format, version=resource.version, type=resource.type,
+        resource_type=resource.resource_type or "image",
+    )
+    combined.update(resource.url_options)
+    combined.update(options)
+    return build_url(resource.public_id, **combined)
+
+
+def clear_cache():
+    """Drops memoized URLs, e.g. after changing the Cloudinary configuration."""
+    _build_url.cache_clear()
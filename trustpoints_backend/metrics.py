@@ -0,0 +1,243 @@
+"""
+In-process request metrics.
+
+``PerformanceMiddleware`` times each sampled request and splits it into
+phases: database queries, response serialization and external storage
+(Cloudinary) calls. The phases go into fixed-bucket histograms kept in this
+process, which ``metrics_view`` exposes in the Prometheus text format, and
+into a ``Server-Timing`` header for admins (or everyone with ``DEBUG``).
+
+Code outside the middleware reports a phase with ``timed("storage")``;
+outside a sampled request it costs one context-variable lookup. The
+``serialize`` phase covers building the response data (serializers through
+``TimedSerializerMixin``, the row fast path in ``RowMapper``) and rendering it. Query
+fingerprints and the slow-query log live in ``query_log``.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+
+from . import query_log
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+# Timings of the sampled request being handled, None otherwise
+current_timings = ContextVar("current_timings", default=None)
+
+
+class RequestTimings:
+    """Accumulated time per phase, plus the database queries run."""
+
+    __slots__ = ("phases", "queries", "statements", "active")
+
+    def __init__(self):
+        self.phases = {}
+        self.active = set()  # phases being timed, see timed()
+        self.queries = 0
+        self.statements = {}  # sql -> [calls, seconds], fingerprinted once the request ends
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def add_query(self, sql, seconds):
+        self.queries += 1
+        self.add("db", seconds)
+        entry = self.statements.get(sql)
+        if entry is None:
+            self.statements[sql] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+
+@contextmanager
+def timed(phase):
+    """
+    Adds the time spent in the block to ``phase`` of the current sampled
+    request. Queries run inside the block only count as ``db``, and a block
+    nested in one of the same phase is not counted twice.
+    """
+    timings = current_timings.get()
+    if timings is None or phase in timings.active:
+        yield
+        return
+    timings.active.add(phase)
+    db = timings.phases.get("db", 0.0)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.active.discard(phase)
+        timings.add(phase, time.perf_counter() - started - (timings.phases.get("db", 0.0) - db))
+
+
+class TimedSerializerMixin:
+    """Serializer mixin that reports ``to_representation`` as the request's ``serialize`` phase."""
+
+    def to_representation(self, instance):
+        with timed("serialize"):
+            return super().to_representation(instance)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper: records the queries of sampled requests and
+    sends slow queries to the slow-query log (see ``query_log``).
+    """
+    timings = current_timings.get()
+    if timings is None and not settings.SLOW_QUERY_MS:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    elapsed = time.perf_counter() - started
+    if timings is not None:
+        timings.add_query(sql, elapsed)
+    if not many and query_log.is_slow(elapsed):
+        query_log.log_slow_query(context["connection"], sql, params, elapsed)
+    return result
+
+
+def _add_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def install_query_recorder():
+    """Wraps every database connection, current and future, with ``record_query``."""
+    connection_created.connect(_add_query_recorder, dispatch_uid="trustpoints_backend.metrics")
+    for connection in connections.all(initialized_only=True):
+        _add_query_recorder(connection)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, Prometheus style."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Histograms by metric name and label values; one lock, held only for the increments."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}  # name -> (help, buckets, {labels: Histogram})
+
+    def register(self, name, help_text, buckets):
+        self._metrics.setdefault(name, (help_text, buckets, {}))
+
+    def observe_many(self, observations, labels):
+        with self._lock:
+            for name, value in observations:
+                _, buckets, series = self._metrics[name]
+                histogram = series.get(labels)
+                if histogram is None:
+                    histogram = series[labels] = Histogram(buckets)
+                histogram.observe(value)
+
+    def clear(self):
+        with self._lock:
+            for _, _, series in self._metrics.values():
+                series.clear()
+
+    def render(self, label_names):
+        with self._lock:
+            lines = []
+            for name, (help_text, buckets, series) in self._metrics.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in zip(label_names, labels))
+                    cumulative = 0
+                    for bound, count in zip(buckets + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+                    lines.append(f"{name}_sum{{{label_text}}} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+            return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+LABELS = ("view", "method")
+PHASES = ("db", "serialize", "storage")
+
+registry = Registry()
+registry.register("http_request_duration_seconds", "Total request latency.", DURATION_BUCKETS)
+registry.register("http_request_db_queries", "Database queries per request.", QUERY_COUNT_BUCKETS)
+for _phase in PHASES:
+    registry.register(f"http_request_{_phase}_seconds", f"Time per request spent in {_phase}.", DURATION_BUCKETS)
+
+
+def record_request(view, method, total, timings):
+    """Adds a finished request to the histograms and the per-fingerprint query stats."""
+    observations = [
+        ("http_request_duration_seconds", total),
+        ("http_request_db_queries", timings.queries),
+    ]
+    observations.extend((f"http_request_{phase}_seconds", timings.phases.get(phase, 0.0)) for phase in PHASES)
+    registry.observe_many(observations, (view, method))
+    query_log.record_request_queries(view, timings.statements)
+
+
+def render_query_stats():
+    """Per-fingerprint counters in the Prometheus text format."""
+    lines = [
+        "# HELP db_query_calls_total Queries run, by view and fingerprint.",
+        "# TYPE db_query_calls_total counter",
+        "# HELP db_query_seconds_total Time spent in queries, by view and fingerprint.",
+        "# TYPE db_query_seconds_total counter",
+        "# HELP db_query_n_plus_one_total Requests that repeated the query at least QUERY_N_PLUS_ONE_THRESHOLD times.",
+        "# TYPE db_query_n_plus_one_total counter",
+        "# HELP db_query_fingerprint_info Normalized SQL of each fingerprint.",
+        "# TYPE db_query_fingerprint_info gauge",
+    ]
+    fingerprints = {}
+    for view, fingerprint_id, sql, calls, seconds, n_plus_one in query_log.query_stats.snapshot():
+        labels = f'view="{_escape(view)}",fingerprint="{fingerprint_id}"'
+        lines.append(f"db_query_calls_total{{{labels}}} {calls}")
+        lines.append(f"db_query_seconds_total{{{labels}}} {seconds:.6f}")
+        lines.append(f"db_query_n_plus_one_total{{{labels}}} {n_plus_one}")
+        fingerprints[fingerprint_id] = sql
+    for fingerprint_id, sql in sorted(fingerprints.items()):
+        lines.append(f'db_query_fingerprint_info{{fingerprint="{fingerprint_id}",sql="{_escape(sql)}"}} 1')
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(total, timings):
+    """``Server-Timing`` header value, durations in milliseconds."""
+    entries = [f'db;dur={timings.phases.get("db", 0.0) * 1000:.2f};desc="{timings.queries} queries"']
+    entries.extend(
+        f"{phase};dur={timings.phases[phase] * 1000:.2f}" for phase in PHASES[1:] if phase in timings.phases
+    )
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; requires ``Authorization: Bearer <METRICS_TOKEN>`` and is closed without one."""
+    token = settings.METRICS_TOKEN
+    if not token or not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(LABELS) + render_query_stats(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,78 @@
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from admin_panel.permissions import IsCustomAdmin
+
+from .metrics import RequestTimings, current_timings, record_request, server_timing, timed
+
+
+class PerformanceMiddleware:
+    """
+    Times a ``PERF_SAMPLE_RATE`` share of requests (see ``metrics``) and
+    feeds the histograms. Sampled responses to admins, or to anyone with
+    ``DEBUG`` on, also get a ``Server-Timing`` header; it discloses query
+    counts and database time, so other clients never see it. Unsampled
+    requests pass straight through. Works for sync and async views.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        started, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timings = current_timings.get()
+            current_timings.reset(token)
+        return self.finish(request, response, started, timings)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        started, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            timings = current_timings.get()
+            current_timings.reset(token)
+        return self.finish(request, response, started, timings)
+
+    def process_template_response(self, request, response):
+        # DRF responses render lazily; render here so encoding counts as serialization too
+        if current_timings.get() is not None:
+            with timed("serialize"):
+                response.render()
+        return response
+
+    @staticmethod
+    def sampled():
+        rate = settings.PERF_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    @staticmethod
+    def start():
+        return time.perf_counter(), current_timings.set(RequestTimings())
+
+    @staticmethod
+    def finish(request, response, started, timings):
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        # Routes, not paths, keep the label set bounded
+        view = match.route if match else "unmatched"
+        record_request(view, request.method, total, timings)
+        if settings.DEBUG or IsCustomAdmin().has_permission(request, None):
+            response["Server-Timing"] = server_timing(total, timings)
+        return response
@@ -0,0 +1,127 @@
+"""
+Query fingerprints, N+1 detection and the slow-query log.
+
+A fingerprint is the SQL with literals and ``IN`` lists normalized away, so
+``WHERE id IN (1, 2)`` and ``WHERE id IN (3)`` count as the same query.
+Sampled requests (see ``metrics``) collect the SQL they ran; when they
+finish, ``query_stats`` adds calls and time per view and fingerprint, and a
+fingerprint repeated ``QUERY_N_PLUS_ONE_THRESHOLD`` times in one request is
+logged and counted as an N+1 suspect.
+
+Independently of sampling, any query slower than ``SLOW_QUERY_MS`` is logged
+by fingerprint with its ``EXPLAIN`` plan. Parameters are never logged: they
+carry usernames, emails, password hashes and token ids.
+"""
+import hashlib
+import logging
+import re
+import threading
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger("trustpoints_backend.queries")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?|\$\d+)\s*,?)+\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*(\((?:[^()]|\([^()]*\))*\)\s*,?\s*)+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# Set while the slow-query log runs its own EXPLAIN, so that is not timed again
+_explaining = ContextVar("explaining", default=False)
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    """Returns ``(fingerprint_id, normalized_sql)`` for a SQL string."""
+    normalized = _STRING.sub("?", sql)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (...)", normalized)
+    normalized = _VALUES_LIST.sub("VALUES (...) ", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12], normalized
+
+
+class QueryStats:
+    """Calls, time and N+1 suspicions per (view, fingerprint), bounded in size."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # (view, fingerprint_id) -> [calls, seconds, n_plus_one]
+        self._sql = {}  # fingerprint_id -> normalized sql
+
+    def record(self, view, queries):
+        """Adds one request's ``{sql: [calls, seconds]}``; returns the N+1 suspects."""
+        by_fingerprint = {}
+        for sql, (calls, seconds) in queries.items():
+            fingerprint_id, normalized = fingerprint(sql)
+            entry = by_fingerprint.setdefault(fingerprint_id, [normalized, 0, 0.0])
+            entry[1] += calls
+            entry[2] += seconds
+
+        threshold = settings.QUERY_N_PLUS_ONE_THRESHOLD
+        suspects = []
+        with self._lock:
+            for fingerprint_id, (normalized, calls, seconds) in by_fingerprint.items():
+                key = (view, fingerprint_id)
+                entry = self._entries.get(key)
+                if entry is None:
+                    if len(self._entries) >= settings.QUERY_STATS_MAX_ENTRIES:
+                        continue
+                    entry = self._entries[key] = [0, 0.0, 0]
+                    self._sql[fingerprint_id] = normalized
+                entry[0] += calls
+                entry[1] += seconds
+                if calls >= threshold:
+                    entry[2] += 1
+                    suspects.append((normalized, calls))
+        return suspects
+
+    def snapshot(self):
+        """Returns ``[(view, fingerprint_id, sql, calls, seconds, n_plus_one), ...]``."""
+        with self._lock:
+            return [
+                (view, fingerprint_id, self._sql[fingerprint_id], *entry)
+                for (view, fingerprint_id), entry in sorted(self._entries.items())
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sql.clear()
+
+
+query_stats = QueryStats()
+
+
+def record_request_queries(view, queries):
+    for sql, calls in query_stats.record(view, queries):
+        logger.warning("Possible N+1 in %s: %d identical queries: %s", view, calls, sql)
+
+
+def is_slow(seconds):
+    threshold = settings.SLOW_QUERY_MS
+    return bool(threshold) and seconds * 1000 >= threshold and not _explaining.get()
+
+
+def log_slow_query(connection, sql, params, seconds):
+    """Logs a slow query; SELECTs get their plan from the same connection."""
+    plan = None
+    if sql.lstrip()[:6].upper() == "SELECT":
+        token = _explaining.set(True)
+        try:
+            # In a savepoint: on PostgreSQL a failed EXPLAIN would otherwise abort the request's transaction
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+                plan = "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+        except Exception:  # the plan is best effort; never fail the request over it
+            logger.debug("EXPLAIN failed", exc_info=True)
+        finally:
+            _explaining.reset(token)
+    fingerprint_id, normalized = fingerprint(sql)
+    logger.warning(
+        "Slow query %s (%.1f ms): %s\nplan:\n%s", fingerprint_id, seconds * 1000, normalized, plan or "(not available)"
+    )
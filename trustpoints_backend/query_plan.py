@@ -0,0 +1,39 @@
+"""
+Query plans declared on serializers.
+
+A serializer lists the relations and columns it reads in its ``Meta``::
+
+    class Meta:
+        model = Task
+        select_related = ["app", "user"]
+        only = ["id", "status", "app__name", "user__username"]
+
+and any view using ``QueryPlanMixin`` applies them to its queryset, so
+serializing N rows costs one query instead of 1 + N per relation.
+"""
+
+
+def apply_query_plan(queryset, serializer_class):
+    """Applies the serializer's declared ``select_related``/``only`` to a queryset."""
+    meta = getattr(serializer_class, "Meta", None)
+    select_related = getattr(meta, "select_related", None)
+    only = getattr(meta, "only", None)
+
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if only:
+        queryset = queryset.only(*only)
+    return queryset
+
+
+class QueryPlanMixin:
+    """
+    Generic view mixin that shapes the queryset with the query plan of the
+    view's serializer. The plan is applied in ``filter_queryset()`` so views
+    can keep overriding ``get_queryset()``, and it covers list and detail
+    views alike since ``get_object()`` goes through the same hook.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return apply_query_plan(queryset, self.get_serializer_class())
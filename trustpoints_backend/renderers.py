@@ -0,0 +1,35 @@
+"""
+JSON rendering through orjson (a pinned requirement).
+
+``FastJSONRenderer`` returns exactly the bytes DRF's ``JSONRenderer`` would
+for payloads of strings, integers, booleans, None, lists and dicts, which is
+what the list endpoints serve. It is not a global default: orjson formats
+floats differently (``1e16`` instead of ``1e+16``) and writes NaN as null.
+Payloads orjson rejects (huge integers, non-string keys) and indented output
+go through ``JSONRenderer`` itself, as does everything when the
+UNICODE_JSON or COMPACT_JSON settings are turned off, or orjson can't be
+imported (e.g. no wheel for the platform).
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # fall back to the standard encoder rather than fail
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or data is None or indent or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            # Datetimes and the like go through DRF's encoder, as with JSONRenderer
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer escapes the JavaScript line terminators
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
@@ -0,0 +1,155 @@
+"""
+Serializer output built straight from ``.values_list()`` rows.
+
+``ModelSerializer`` pays per row and per field for attribute lookups,
+``get_attribute``/``to_representation`` dispatch and model instantiation.
+Read-only list endpoints instead fetch plain tuples and turn them into the
+same dicts with a mapper compiled once per serializer class:
+
+    rows = RowMapper.for_serializer(TaskSerializer)
+    data = rows.serialize(Task.objects.filter(user_id=user_id))
+
+Generic list views get this with ``RowListMixin``.
+
+Plain columns (ids, strings, integers, booleans, primary-key relations) are
+copied as fetched; ISO 8601 datetimes are converted to the current time
+zone, which is looked up once per list rather than per row; other fields
+keep their serializer's ``to_representation``. Method fields name the columns they read and a
+function computing the value from them, in the serializer's ``Meta``::
+
+    class Meta:
+        row_fields = {"screenshot": (["screenshot_url", "screenshot"], stored_url)}
+
+The output is identical to ``Serializer(..., many=True).data``, which the
+parity tests in ``user_panel.tests`` check byte for byte.
+"""
+from functools import cache
+from operator import itemgetter
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from .metrics import timed
+from .renderers import FastJSONRenderer
+
+# Fields whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+
+
+def _converted(index, convert):
+    def get(row):
+        value = row[index]
+        return None if value is None else convert(value)
+    return get
+
+
+class DateTimeColumn:
+    """``DateTimeField.to_representation``, bound to the time zone active for one list."""
+
+    def __init__(self, index, field):
+        self.index = index
+        self.field = field
+
+    def bind(self):
+        index, field = self.index, self.field
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+        if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+            return _converted(index, field.to_representation)
+
+        def get(row):
+            value = row[index]
+            if value is None:
+                return None
+            if value.utcoffset() is None:
+                return field.to_representation(value)
+            value = value.astimezone(field_timezone).isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+        return get
+
+
+def _computed(indexes, compute):
+    def get(row):
+        return compute(*[row[index] for index in indexes])
+    return get
+
+
+class RowMapper:
+    """Maps ``values_list()`` rows of a model to a serializer's representation."""
+
+    def __init__(self, serializer_class):
+        row_fields = getattr(getattr(serializer_class, "Meta", None), "row_fields", {})
+        self.columns = []
+        self.fields = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in row_fields:
+                columns, compute = row_fields[name]
+                getter = _computed([self.column_index(column) for column in columns], compute)
+            elif isinstance(field, serializers.SerializerMethodField):
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.Meta.row_fields must declare the columns of '{name}'."
+                )
+            else:
+                index = self.column_index("__".join(field.source_attrs))
+                if isinstance(field, PASSTHROUGH_FIELDS) and getattr(field, "pk_field", None) is None:
+                    getter = itemgetter(index)
+                elif isinstance(field, serializers.DateTimeField):
+                    getter = DateTimeColumn(index, field)
+                else:
+                    getter = _converted(index, field.to_representation)
+            self.fields.append((name, getter))
+
+    @classmethod
+    @cache
+    def for_serializer(cls, serializer_class):
+        return cls(serializer_class)
+
+    def column_index(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+        return self.columns.index(column)
+
+    def values(self, queryset):
+        """The queryset's rows as named tuples of the needed columns."""
+        return queryset.values_list(*self.columns, named=True)
+
+    def to_representation(self, rows):
+        # Fetch first, so the query counts as db and only the mapping as serialize
+        rows = list(rows)
+        with timed("serialize"):
+            fields = [
+                (name, get.bind() if isinstance(get, DateTimeColumn) else get) for name, get in self.fields
+            ]
+            return [{name: get(row) for name, get in fields} for row in rows]
+
+    def serialize(self, queryset):
+        return self.to_representation(self.values(queryset))
+
+
+class RowListMixin:
+    """
+    List view mixin that serves ``list()`` through the view's ``RowMapper``
+    and renders it with ``FastJSONRenderer``. Pagination still applies;
+    paginators receive named rows instead of model instances.
+    """
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def list(self, request, *args, **kwargs):
+        rows = RowMapper.for_serializer(self.get_serializer_class())
+        queryset = rows.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(rows.to_representation(page))
+        return Response(rows.to_representation(queryset))
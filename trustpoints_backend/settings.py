@@ -11,10 +11,13 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from datetime import timedelta
+import importlib.util
 import os
 from pathlib import Path
 import cloudinary
-from decouple import config
+from decouple import Csv, config
+from django.conf import global_settings
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,6 +51,7 @@ INSTALLED_APPS = [
     "cloudinary",
     "cloudinary_storage",
 
+    'trustpoints_backend',
     'auth_system',
     'admin_panel',
     'user_panel',
@@ -55,6 +59,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'trustpoints_backend.middleware.PerformanceMiddleware',
+    'admin_panel.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -67,6 +73,21 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'trustpoints_backend.urls'
 
+# Share of requests timed by PerformanceMiddleware (/metrics histograms, and the
+# Server-Timing header for admins or with DEBUG); 1.0 times every request.
+PERF_SAMPLE_RATE = config('PERF_SAMPLE_RATE', default=0.01, cast=float)
+# Bearer token required to scrape /metrics; the endpoint is closed while it is empty.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+# Admin request profiles (admin_panel.profiling): how many are kept, and for how many seconds.
+PROFILE_BUFFER_SIZE = config('PROFILE_BUFFER_SIZE', default=20, cast=int)
+PROFILE_TIMEOUT = config('PROFILE_TIMEOUT', default=60 * 60 * 24, cast=int)
+# Queries slower than this are logged with their EXPLAIN plan; 0 disables the log.
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=200, cast=int)
+# A query repeated this often within one sampled request is logged as an N+1 suspect.
+QUERY_N_PLUS_ONE_THRESHOLD = 5
+# Cap on the (view, query fingerprint) pairs tracked for /metrics.
+QUERY_STATS_MAX_ENTRIES = 2000
+
 
 # Cloudinary Configuration
 CLOUDINARY_STORAGE = {
@@ -77,6 +98,22 @@ CLOUDINARY_STORAGE = {
 
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 
+# Screenshot uploads are spooled locally and pushed to storage by a worker pool
+SCREENSHOT_STORAGE_BACKEND = config(
+    'SCREENSHOT_STORAGE_BACKEND', default='user_panel.uploads.CloudinaryScreenshotStorage'
+)
+SCREENSHOT_SPOOL_DIR = config('SCREENSHOT_SPOOL_DIR', default=str(BASE_DIR / 'spool' / 'screenshots'))
+SCREENSHOT_LOCAL_STORAGE_DIR = config('SCREENSHOT_LOCAL_STORAGE_DIR', default=str(BASE_DIR / 'media' / 'screenshots'))
+SCREENSHOT_UPLOAD_WORKERS = config('SCREENSHOT_UPLOAD_WORKERS', default=4, cast=int)  # 0 uploads inline
+SCREENSHOT_UPLOAD_RETRIES = 3
+# Screenshots are downscaled to fit this box and re-encoded before upload
+SCREENSHOT_MAX_DIMENSION = 1600
+SCREENSHOT_FORMAT = 'WEBP'
+SCREENSHOT_QUALITY = 80
+
+# Number of Cloudinary delivery URLs memoized per process (see trustpoints_backend.media_urls)
+MEDIA_URL_CACHE_SIZE = 8192
+
 # For production we have to configure the cloudinary object
 # cloudinary.config(
 #     cloud_name=CLOUDINARY_STORAGE["CLOUD_NAME"],
@@ -100,7 +137,7 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=50),
     'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True,
+    'BLACKLIST_AFTER_ROTATION': True,  # enforced by auth_system.blacklist, not simplejwt's token_blacklist app
     'UPDATE_LAST_LOGIN': False,
 
     'ALGORITHM': 'HS256',
@@ -128,6 +165,12 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Read-only views authenticate from token claims (auth_system.authentication.ClaimsJWTAuthentication).
+# When on, tokens issued before the user's latest token version (auth_system.models.TokenVersion) are rejected.
+JWT_TOKEN_VERSION_CHECK = True
+# Seconds a user's token version is cached; the table stays the source of truth.
+TOKEN_VERSION_CACHE_TIMEOUT = 60 * 60
+
 # CSRF_COOKIE_HTTPONLY = True
 
 AUTH_USER_MODEL = 'auth_system.AppUser'
@@ -161,16 +204,149 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'trustpoints_backend.wsgi.application'
 
+# Route the read-heavy user_panel endpoints to native async views (user_panel.async_views).
+# Only worth it under ASGI; trustpoints_backend/asgi.py turns it on by default.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DATABASE_ENGINE selects the profile:
+#   sqlite    single node; WAL journal so readers don't block the writer, and
+#             writers wait (busy_timeout) instead of failing with "database is locked"
+#   postgres  production; connections come from Django's native pool (needs
+#             psycopg[pool]) or, with DATABASE_POOL off, persist for CONN_MAX_AGE.
+#             DATABASE_REPLICA_HOSTS adds read replicas, see trustpoints_backend.db_router
+DATABASE_ENGINE = config('DATABASE_ENGINE', default='sqlite')
+
+if DATABASE_ENGINE == 'postgres':
+    DATABASE_POOL = config('DATABASE_POOL', default=True, cast=bool)
+
+    def _postgres(host):
+        return {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DATABASE_NAME', default='trustpoints'),
+            'USER': config('DATABASE_USER', default='trustpoints'),
+            'PASSWORD': config('DATABASE_PASSWORD', default=''),
+            'HOST': host,
+            'PORT': config('DATABASE_PORT', default='5432'),
+            # The pool owns connection reuse; Django rejects CONN_MAX_AGE with it
+            'CONN_MAX_AGE': 0 if DATABASE_POOL else config('DATABASE_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': not DATABASE_POOL,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': config('DATABASE_POOL_MIN_SIZE', default=2, cast=int),
+                    'max_size': config('DATABASE_POOL_MAX_SIZE', default=10, cast=int),
+                    'timeout': config('DATABASE_POOL_TIMEOUT', default=10, cast=int),
+                },
+            } if DATABASE_POOL else {},
+        }
+
+    DATABASES = {'default': _postgres(config('DATABASE_HOST', default='localhost'))}
+    for index, host in enumerate(config('DATABASE_REPLICA_HOSTS', default='', cast=Csv())):
+        DATABASES[f'replica_{index}'] = {**_postgres(host), 'TEST': {'MIRROR': 'default'}}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DATABASE_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': {
+                'init_command': (
+                    'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; '
+                    f"PRAGMA busy_timeout={config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int)};"
+                ),
+                # Take the write lock when the transaction starts, so concurrent
+                # writers queue on busy_timeout instead of deadlocking on upgrade
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+DATABASE_ROUTERS = ['trustpoints_backend.db_router.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Catalog versions, leaderboard generations and admin profiles must be
+# seen by every worker, so production needs a shared cache
+# (CACHE_URL=redis://...; `manage.py check --deploy` enforces it). Without
+# one, each process gets its own in-memory cache, which is only fit for
+# development and tests.
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a rendered app catalog version stays cached. Edits invalidate it
+# immediately, so this only bounds memory held by unused versions.
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+
+# How admin list pages count their rows: exact, cached or approximate
+# (see admin_panel.pagination.AdminPagination).
+ADMIN_PAGINATION_COUNT = config('ADMIN_PAGINATION_COUNT', default='exact')
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+# Planner estimates below this are replaced by an exact count.
+ADMIN_APPROXIMATE_COUNT_THRESHOLD = 10000
+
+# Seconds a response is kept for replay under its Idempotency-Key (user_panel.idempotency);
+# run `manage.py prune_idempotency_keys` periodically to delete older ones.
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=60 * 60 * 24, cast=int)
+# Seconds after which a key whose first request never stored a response is freed.
+IDEMPOTENCY_IN_PROGRESS_TIMEOUT = config('IDEMPOTENCY_IN_PROGRESS_TIMEOUT', default=5 * 60, cast=int)
+
+# Seconds before a process reloads its in-memory leaderboard from the database.
+LEADERBOARD_REFRESH_SECONDS = 300
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+# PASSWORD_HASHER picks the algorithm for new hashes; existing hashes of the other
+# algorithms (or with other costs) still verify and are rehashed on the next login.
+
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2')  # pbkdf2 | scrypt | argon2
+PASSWORD_PBKDF2_ITERATIONS = config('PASSWORD_PBKDF2_ITERATIONS', default=870000, cast=int)
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config('PASSWORD_SCRYPT_BLOCK_SIZE', default=8, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config('PASSWORD_SCRYPT_PARALLELISM', default=5, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=102400, cast=int)
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=8, cast=int)
+# Password hashes computed at once per process; 0 leaves it unbounded
+PASSWORD_HASHING_CONCURRENCY = config('PASSWORD_HASHING_CONCURRENCY', default=0, cast=int)
+
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'auth_system.hashers.TunablePBKDF2PasswordHasher',
+    'scrypt': 'auth_system.hashers.TunableScryptPasswordHasher',
+}
+if importlib.util.find_spec('argon2'):
+    _PASSWORD_HASHERS['argon2'] = 'auth_system.hashers.TunableArgon2PasswordHasher'
+if PASSWORD_HASHER not in _PASSWORD_HASHERS:
+    raise ImproperlyConfigured(
+        f"PASSWORD_HASHER={PASSWORD_HASHER!r} is unknown or its package is not installed (argon2 needs argon2-cffi)"
+    )
+# Django's defaults stay last so hashes of other algorithms still verify; the
+# ones replaced by a tunable subclass are left out, as the last hasher of an
+# algorithm is the one that verifies it.
+_REPLACED_HASHERS = {
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
 }
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + [hasher for hasher in global_settings.PASSWORD_HASHERS if hasher not in _REPLACED_HASHERS]
 
 
 # Password validation
@@ -17,8 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('auth/', include('auth_system.urls')),
     path('admin_panel/', include('admin_panel.urls')),
     path('user_panel/', include('user_panel.urls')),
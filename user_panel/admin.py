@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Task
+from .models import PointsTransaction, Task
 
 # Register your models here.
 admin.site.register(Task)
+admin.site.register(PointsTransaction)
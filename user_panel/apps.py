@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UserPanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'user_panel'
+
+    def ready(self):
+        from . import signals  # noqa: F401  (registers signal receivers)
@@ -0,0 +1,94 @@
+"""
+Native async versions of the read-heavy user_panel endpoints.
+
+Under ASGI a synchronous DRF view costs a thread hop per request. These
+views run on the event loop instead: authentication comes from the token
+claims (no query, see ``ClaimsJWTAuthentication``), rows are fetched with
+Django's async ORM, and responses are rendered to the same JSON the DRF
+views produce. They are routed in place of the DRF views when
+``ASYNC_VIEWS`` is on, which the ASGI entry point enables.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+
+from auth_system.authentication import ClaimsJWTAuthentication
+from trustpoints_backend.db_router import replica_reads
+from trustpoints_backend.metrics import timed
+from trustpoints_backend.query_plan import apply_query_plan
+from trustpoints_backend.renderers import FastJSONRenderer
+from trustpoints_backend.rows import RowMapper
+from .catalog import aget_catalog, catalog_response
+from .models import App, Task
+from .serializers import AppSerializer, TaskSerializer
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    with timed("serialize"):
+        body = FastJSONRenderer().render(data)
+    return HttpResponse(body, content_type="application/json", status=status)
+
+
+async def aauthenticate(request):
+    """Returns the request user; raises DRF authentication errors like the sync views."""
+    authentication = ClaimsJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        raise exceptions.NotAuthenticated()
+
+    validated_token = authentication.get_validated_token(raw_token)
+    user = await authentication.aget_claims_user(validated_token)
+    if user is None:
+        # Token without trusted claims: fall back to the database lookup
+        user = await sync_to_async(authentication.get_user)(validated_token)
+    return user
+
+
+class AsyncAPIView(View):
+    """Authenticated, read-only async view with DRF-compatible error responses."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            with replica_reads():
+                request.user = await aauthenticate(request)
+                return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = json_response(
+                exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}, status=exc.status_code
+            )
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                response["WWW-Authenticate"] = ClaimsJWTAuthentication().authenticate_header(request)
+            return response
+
+
+class AsyncAppListView(AsyncAPIView):
+    async def get(self, request):
+        etag, body = await aget_catalog()
+        return catalog_response(request, etag, body)
+
+
+class AsyncAppDetailView(AsyncAPIView):
+    async def get(self, request, pk):
+        try:
+            app = await App.objects.aget(pk=pk)
+        except App.DoesNotExist:
+            raise exceptions.NotFound("No App matches the given query.")
+        return json_response(AppSerializer(app).data)
+
+
+class AsyncUserTasksListView(AsyncAPIView):
+    async def get(self, request):
+        rows = RowMapper.for_serializer(TaskSerializer)
+        tasks = rows.values(Task.objects.filter(user_id=request.user.id))
+        return json_response(rows.to_representation([task async for task in tasks]))
+
+
+class AsyncTaskDetailView(AsyncAPIView):
+    async def get(self, request, pk):
+        try:
+            task = await apply_query_plan(Task.objects.all(), TaskSerializer).aget(pk=pk)
+        except Task.DoesNotExist:
+            raise exceptions.NotFound("No Task matches the given query.")
+        return json_response(TaskSerializer(task).data)
@@ -0,0 +1,98 @@
+"""
+Cached public app catalog.
+
+The catalog only changes when an admin adds, edits or soft-deletes an app,
+so ``AppListView`` serves pre-rendered JSON bytes from the cache instead of
+querying and serializing every row on every request. Each cached body is
+stored under a version stamp; any ``App`` save bumps the stamp (see
+``user_panel.signals``), so stale bodies are simply never read again and
+expire on their own.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from admin_panel.models import App
+from trustpoints_backend.db_router import primary_reads
+from trustpoints_backend.metrics import timed
+from trustpoints_backend.renderers import FastJSONRenderer
+from trustpoints_backend.rows import RowMapper
+
+CATALOG_VERSION_KEY = "user_panel:catalog:version"
+CATALOG_BODY_KEY = "user_panel:catalog:body:{version}"
+
+
+def get_catalog_version():
+    """Returns the current version stamp, creating one if none is cached."""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def invalidate_catalog():
+    """Moves the catalog to a new version; the next read re-renders it."""
+    cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def catalog_rows():
+    """Mapper and rows of the live apps, as ``AppSerializer`` represents them."""
+    from .serializers import AppSerializer
+
+    mapper = RowMapper.for_serializer(AppSerializer)
+    return mapper, mapper.values(App.objects.filter(is_deleted=False))
+
+
+def render_catalog(mapper, rows):
+    """Serializes the app rows to the exact bytes AppListView returns."""
+    with timed("serialize"):
+        return FastJSONRenderer().render(mapper.to_representation(rows))
+
+
+def _entry(body):
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32], body
+
+
+def get_catalog():
+    """Returns ``(etag, body)`` for the current catalog, rendering it on a miss."""
+    key = CATALOG_BODY_KEY.format(version=get_catalog_version())
+    entry = cache.get(key)
+    if entry is None:
+        # Cached until the next edit, so never rendered from a lagging replica
+        with primary_reads():
+            entry = _entry(render_catalog(*catalog_rows()))
+        cache.set(key, entry, timeout=settings.CATALOG_CACHE_TIMEOUT)
+    return entry
+
+
+async def aget_catalog():
+    """Async ``get_catalog()`` for the native async views."""
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = await cache.aget(CATALOG_VERSION_KEY)
+    key = CATALOG_BODY_KEY.format(version=version)
+    entry = await cache.aget(key)
+    if entry is None:
+        with primary_reads():
+            mapper, rows = catalog_rows()
+            entry = _entry(render_catalog(mapper, [row async for row in rows]))
+        await cache.aset(key, entry, timeout=settings.CATALOG_CACHE_TIMEOUT)
+    return entry
+
+
+def catalog_response(request, etag, body):
+    """200 with the catalog body, or an empty 304 if the client's If-None-Match matches."""
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if "*" in if_none_match or etag in if_none_match or f"W/{etag}" in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,83 @@
+"""
+Per-user task status counters.
+
+``TaskStatusCounts`` holds how many tasks each user has in each status.
+Every code path that changes a task's status calls ``move_tasks`` in the
+same transaction, which shifts the counts with ``F()`` expressions, so
+concurrent transitions never overwrite each other. A user without a
+counter row yet gets one built from the task table.
+"""
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.functions import Greatest
+
+from trustpoints_backend.db_router import primary_reads
+from .models import Task, TaskStatusCounts
+
+STATUSES = [status for status, _ in Task.STATUS_CHOICES]
+
+
+def move_tasks(moves, from_status=None, to_status=None):
+    """
+    Records that ``moves[user_id]`` tasks of each user went from
+    ``from_status`` to ``to_status``; either may be None for tasks that were
+    created or deleted. One query for any number of users, plus a rebuild
+    for users without a counter row.
+    """
+    moves = {user_id: count for user_id, count in moves.items() if count}
+    if not moves:
+        return
+
+    if len(moves) == 1:
+        delta = Value(next(iter(moves.values())))
+    else:
+        delta = Case(
+            *[When(user_id=user_id, then=Value(count)) for user_id, count in moves.items()],
+            output_field=models.PositiveIntegerField(),
+        )
+
+    changes = {}
+    if from_status:
+        changes[from_status] = Greatest(F(from_status) - delta, Value(0))
+    if to_status:
+        changes[to_status] = F(to_status) + delta
+
+    counters = TaskStatusCounts.objects.filter(user_id__in=moves)
+    if counters.update(**changes) < len(moves):
+        existing = set(counters.values_list("user_id", flat=True))
+        rebuild_counts([user_id for user_id in moves if user_id not in existing])
+
+
+def move_task(user_id, from_status=None, to_status=None):
+    move_tasks({user_id: 1}, from_status, to_status)
+
+
+def rebuild_counts(user_ids=None):
+    """
+    Recomputes counters from the task table, for ``user_ids`` or everyone.
+    Returns ``{user_id: {status: count}}`` for the rows written.
+    """
+    tasks = Task.objects.all() if user_ids is None else Task.objects.filter(user_id__in=user_ids)
+    counts = {user_id: dict.fromkeys(STATUSES, 0) for user_id in user_ids or ()}
+    for user_id, status, total in tasks.values_list("user_id", "status").annotate(total=Count("id")).order_by():
+        counts.setdefault(user_id, dict.fromkeys(STATUSES, 0))[status] = total
+
+    with transaction.atomic():
+        if user_ids is None:
+            # Users whose tasks are all gone keep a row, zeroed
+            TaskStatusCounts.objects.update(**dict.fromkeys(STATUSES, 0))
+        TaskStatusCounts.objects.bulk_create(
+            [TaskStatusCounts(user_id=user_id, **statuses) for user_id, statuses in counts.items()],
+            update_conflicts=True, unique_fields=["user"], update_fields=STATUSES, batch_size=1000,
+        )
+    return counts
+
+
+def get_counts(user_id):
+    """Returns the user's counts per status plus ``total``."""
+    row = TaskStatusCounts.objects.filter(user_id=user_id).values(*STATUSES).first()
+    if row is None:
+        # The rebuilt row is stored, so count from the primary
+        with primary_reads():
+            row = rebuild_counts([user_id])[user_id]
+    return {**row, "total": sum(row.values())}
@@ -0,0 +1,100 @@
+"""
+Idempotency-Key support for write endpoints.
+
+A client that retries a request (e.g. after a timeout) sends the same
+``Idempotency-Key`` header each time. The first request runs and its
+response is kept in the ``IdempotencyKey`` table for ``IDEMPOTENCY_KEY_TTL``
+seconds; repeats get that response back instead of running the view again.
+A repeat that arrives while the first is still running gets 409 (for up to
+``IDEMPOTENCY_IN_PROGRESS_TIMEOUT`` seconds, after which the first request is
+taken for dead), and reusing a key for a different request gets 422.
+
+Keys are scoped to the authenticated user. The first request claims its key
+by inserting the row, so the database's unique constraint, not a cache,
+decides which of several concurrent requests runs.
+"""
+import functools
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def request_fingerprint(request):
+    """Identifies the request payload; uploaded files count by name and size."""
+    digest = hashlib.sha256()
+    for name, value in sorted(request.data.items()):
+        if hasattr(value, "size"):
+            value = f"{value.name}:{value.size}"
+        digest.update(f"{name}={value}\n".encode())
+    return digest.hexdigest()
+
+
+def idempotent(view_method):
+    """Makes an APIView handler replay its response for repeated Idempotency-Keys."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"error": "Idempotency-Key is too long"}, status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request)
+        scope = {"user_id": request.user.id, "view": type(self).__name__, "key": hashlib.sha256(key.encode()).hexdigest()}
+        # An expired key is free to be used again, and so is one whose first
+        # request died (worker killed) without storing a response
+        now = timezone.now()
+        IdempotencyKey.objects.filter(
+            Q(created_at__lt=now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL))
+            | Q(status__isnull=True, created_at__lt=now - timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_TIMEOUT)),
+            **scope,
+        ).delete()
+        try:
+            with transaction.atomic():
+                claimed = IdempotencyKey.objects.create(**scope, fingerprint=fingerprint)
+        except IntegrityError:
+            return replay(IdempotencyKey.objects.filter(**scope).first(), fingerprint)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            # Includes worker timeouts (SystemExit) and cancelled async requests
+            claimed.delete()
+            raise
+        if response.status_code >= 500:
+            # Let the client retry failures
+            claimed.delete()
+        else:
+            claimed.status, claimed.data = response.status_code, response.data
+            claimed.save(update_fields=["status", "data"])
+        return response
+
+    return wrapper
+
+
+def replay(stored, fingerprint):
+    if stored is not None and stored.fingerprint != fingerprint:
+        return Response(
+            {"error": "Idempotency-Key was already used for a different request"},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    # A row deleted since the insert failed belonged to a request that just failed
+    if stored is None or stored.status is None:
+        return Response(
+            {"error": "A request with this Idempotency-Key is still being processed"},
+            status=status.HTTP_409_CONFLICT,
+        )
+    response = Response(stored.data, status=stored.status)
+    response["Idempotent-Replayed"] = "true"
+    return response
@@ -0,0 +1,58 @@
+"""
+Screenshot processing run by the upload workers before storage.
+
+Phone screenshots are downscaled to ``SCREENSHOT_MAX_DIMENSION`` and
+re-encoded (WebP by default), and a 64-bit difference hash (dHash) is
+computed. The dHash only depends on the coarse brightness gradient of the
+image, so re-encoded or rescaled copies of one screenshot usually hash
+identically. Resubmissions are found by exact hash equality, an indexed
+lookup; edited copies whose hash differs in a few bits are not flagged,
+since matching by Hamming distance would need a scan of every hash.
+"""
+from django.conf import settings
+from PIL import Image, ImageOps
+
+HASH_SIZE = 8
+
+
+def difference_hash(image):
+    """Returns the dHash of a PIL image as 16 hex digits."""
+    small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            right = pixels[row * (HASH_SIZE + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:016x}"
+
+
+def is_valid_image(uploaded_file):
+    """Cheap header check used by the request before spooling."""
+    try:
+        with Image.open(uploaded_file) as image:
+            image.verify()
+        return True
+    except Exception:
+        return False
+    finally:
+        uploaded_file.seek(0)
+
+
+def process_screenshot(path):
+    """
+    Downscales and re-encodes the image at ``path`` next to it.
+
+    Returns ``(processed_path, hash)``.
+    """
+    image_format = settings.SCREENSHOT_FORMAT
+    processed_path = path.with_name(f"{path.name}.{image_format.lower()}")
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        screenshot_hash = difference_hash(image)
+        image.thumbnail((settings.SCREENSHOT_MAX_DIMENSION, settings.SCREENSHOT_MAX_DIMENSION))
+        image.convert("RGB").save(processed_path, format=image_format, quality=settings.SCREENSHOT_QUALITY)
+
+    return processed_path, screenshot_hash
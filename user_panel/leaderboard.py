@@ -0,0 +1,168 @@
+"""
+Points leaderboard.
+
+Rankings are kept in a process-local ``SortedRanking`` built from the
+database and updated incrementally whenever points are credited, so rank
+lookups are a binary search instead of an ``ORDER BY points`` scan.
+
+Each process reloads its ranking from the database when it is older than
+``LEADERBOARD_REFRESH_SECONDS`` or when the generation stamp in the shared
+cache changes (bumped by ``manage.py rebuild_leaderboard``); that bounds how
+long credits made by other processes can stay invisible here. The reload
+runs outside the lock: one thread builds the new ranking while the others
+keep reading the old one, and credits recorded meanwhile are replayed onto
+it before it is swapped in.
+"""
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+AppUser = get_user_model()
+
+GENERATION_KEY = "user_panel:leaderboard:generation"
+
+
+class SortedRanking:
+    """
+    Users ordered by points, highest first, with ties ordered by user id.
+
+    Ranks use competition ranking ("1224"): a user's rank is one plus the
+    number of users with strictly more points. Lookups are O(log n).
+    """
+
+    def __init__(self, entries=()):
+        self._points = dict(entries)
+        self._keys = sorted((-points, user_id) for user_id, points in self._points.items())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, user_id):
+        return user_id in self._points
+
+    def update(self, user_id, points):
+        old_points = self._points.get(user_id)
+        if old_points is not None:
+            del self._keys[bisect_left(self._keys, (-old_points, user_id))]
+        self._points[user_id] = points
+        insort(self._keys, (-points, user_id))
+
+    def rank_of_points(self, points):
+        return bisect_left(self._keys, (-points,)) + 1
+
+    def rank(self, user_id):
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        return self.rank_of_points(points)
+
+    def points(self, user_id):
+        return self._points.get(user_id)
+
+    def remove(self, user_id):
+        points = self._points.pop(user_id, None)
+        if points is not None:
+            del self._keys[bisect_left(self._keys, (-points, user_id))]
+
+    def top(self, limit):
+        """Returns ``[(rank, user_id, points), ...]`` for the best ``limit`` users."""
+        return [(self.rank_of_points(-neg), user_id, -neg) for neg, user_id in self._keys[:limit]]
+
+
+class Leaderboard:
+    """Process-wide ranking of non-admin users, loaded lazily."""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # guards the ranking; never held across queries
+        self._load_lock = threading.Lock()  # one reload at a time
+        self._ranking = None
+        self._generation = None
+        self._loaded_at = 0.0
+        self._pending = None  # {user_id: points or None} recorded while a reload runs
+
+    def _is_fresh(self, generation):
+        return (
+            self._ranking is not None
+            and generation == self._generation
+            and time.monotonic() - self._loaded_at <= settings.LEADERBOARD_REFRESH_SECONDS
+        )
+
+    def _fetch(self):
+        users = AppUser.objects.filter(is_admin=False, is_active=True).values_list("id", "points")
+        return users.iterator(chunk_size=10000)
+
+    def _load(self, generation):
+        with self._lock:
+            self._pending = {}
+        try:
+            ranking = SortedRanking(self._fetch())
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for user_id, points in self._pending.items():
+                if points is None:
+                    ranking.remove(user_id)
+                else:
+                    ranking.update(user_id, points)
+            self._pending = None
+            self._ranking, self._generation, self._loaded_at = ranking, generation, time.monotonic()
+
+    def _current(self):
+        generation = cache.get(GENERATION_KEY)
+        if not self._is_fresh(generation):
+            # Without a ranking yet there's nothing to serve, so wait for the load
+            if self._load_lock.acquire(blocking=self._ranking is None):
+                try:
+                    if not self._is_fresh(generation):
+                        self._load(generation)
+                finally:
+                    self._load_lock.release()
+        return self._ranking
+
+    def rebuild(self):
+        """Reloads from the database and tells other processes to do the same."""
+        generation = uuid.uuid4().hex
+        cache.set(GENERATION_KEY, generation, timeout=None)
+        with self._load_lock:
+            self._load(generation)
+        return len(self._ranking)
+
+    def record(self, user_id, points, ranked=True):
+        """
+        Applies a user's new balance; a ranking not loaded yet will read it
+        from the DB. Pass ``ranked=False`` for admins and inactive users,
+        which the ranking leaves out.
+        """
+        with self._lock:
+            if self._pending is not None:
+                self._pending[user_id] = points if ranked else None
+            if self._ranking is not None:
+                if ranked:
+                    self._ranking.update(user_id, points)
+                else:
+                    self._ranking.remove(user_id)
+
+    def top(self, limit):
+        ranking = self._current()
+        with self._lock:
+            return ranking.top(limit)
+
+    def rank(self, user_id):
+        """Returns ``(rank, points, total)``; users missing from the ranking are placed by their DB balance."""
+        ranking = self._current()
+        with self._lock:
+            if user_id in ranking:
+                return ranking.rank(user_id), ranking.points(user_id), len(ranking)
+        points = AppUser.objects.values_list("points", flat=True).get(id=user_id)
+        with self._lock:
+            return ranking.rank_of_points(points), points, len(ranking)
+
+
+leaderboard = Leaderboard()
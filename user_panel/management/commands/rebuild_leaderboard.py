@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from user_panel.leaderboard import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the points leaderboard from the database and signals every process to reload it."
+
+    def handle(self, *args, **options):
+        total = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Leaderboard rebuilt with {total} users."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from user_panel.counters import rebuild_counts
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-user task status counters from the task table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="user_ids", help="only this user id (repeatable)")
+
+    def handle(self, *args, **options):
+        counts = rebuild_counts(options["user_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt task counters for {len(counts)} users."))
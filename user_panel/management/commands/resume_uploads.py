@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from user_panel.models import Task
+from user_panel.uploads import abandon_upload, is_spooled, process_upload
+
+
+class Command(BaseCommand):
+    help = "Uploads screenshots of tasks left in the 'uploading' state, e.g. after a restart."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale-after", type=int, default=900,
+            help="take over spool files claimed by another uploader this many seconds ago",
+        )
+
+    def handle(self, *args, **options):
+        done = failed = skipped = lost = 0
+        for task_id in Task.objects.filter(status="uploading").values_list("id", flat=True).iterator():
+            uploaded = process_upload(task_id, stale_after=options["stale_after"])
+            if uploaded is None and not is_spooled(task_id):
+                # Nothing left to upload; free the app for a new submission
+                if abandon_upload(task_id):
+                    lost += 1
+                    self.stderr.write(f"Task {task_id}: spool file lost, task rejected")
+            elif uploaded is None:
+                skipped += 1
+                self.stderr.write(f"Task {task_id}: still being uploaded")
+            elif uploaded:
+                done += 1
+            else:
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Uploaded {done} screenshots ({failed} failed, {skipped} in progress, {lost} lost)."
+        ))
@@ -0,0 +1,155 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from admin_panel.models import App
+from admin_panel.rollups import rebuild_stats
+from auth_system.models import AppUser
+from trustpoints_backend.media_urls import resource_url
+from user_panel.counters import rebuild_counts
+from user_panel.leaderboard import leaderboard
+from user_panel.models import PointsTransaction, Task
+
+CATEGORIES = {
+    "Social": ["Chat", "Video", "Dating"],
+    "Games": ["Puzzle", "Action", "Casual"],
+    "Finance": ["Banking", "Payments", "Crypto"],
+    "Shopping": ["Marketplace", "Deals", "Groceries"],
+}
+# Share of seeded tasks per status
+STATUS_WEIGHTS = {"pending": 30, "verified": 55, "rejected": 15}
+
+
+def chunks(total, size):
+    for start in range(0, total, size):
+        yield start, min(start + size, total)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds synthetic users, apps and tasks for load testing, e.g. "
+        "--users 1000000 --apps 5000 --tasks 20000000. Cloudinary fields get "
+        "made-up public ids; nothing is uploaded. All users share --password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--apps", type=int, default=50)
+        parser.add_argument("--tasks", type=int, default=10000)
+        parser.add_argument("--days", type=int, default=90, help="spread creation times over this many days")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--prefix", default="seed", help="prefix of usernames, app names and public ids")
+        parser.add_argument("--password", default="seed-pass-123")
+        parser.add_argument("--random-seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["tasks"] > options["users"] * options["apps"]:
+            # Every task is a distinct (user, app) pair, as the open-task constraint requires
+            self.stderr.write("--tasks may not exceed --users x --apps")
+            return
+        self.random = random.Random(options["random_seed"])
+        self.now = timezone.now()
+        self.options = options
+
+        user_ids = self.seed_users()
+        apps = self.seed_apps()
+        self.seed_tasks(user_ids, apps)
+        self.seed_derived()
+
+    def created_at(self):
+        return self.now - timedelta(seconds=self.random.randrange(self.options["days"] * 86400))
+
+    def reviewed_at(self, created_at):
+        """When an admin verified or rejected a task created at ``created_at``; never in the future."""
+        return min(created_at + timedelta(seconds=self.random.randrange(60, 2 * 86400)), self.now)
+
+    def seed_users(self):
+        prefix, size = self.options["prefix"], self.options["chunk_size"]
+        password = make_password(self.options["password"])  # hashed once for every user
+        user_ids = []
+        for start, stop in chunks(self.options["users"], size):
+            users = AppUser.objects.bulk_create([
+                AppUser(username=f"{prefix}-user-{n}", email=f"{prefix}-user-{n}@example.com", password=password)
+                for n in range(start, stop)
+            ])
+            user_ids.extend(user.id for user in users)
+            self.progress("users", stop)
+        return user_ids
+
+    def seed_apps(self):
+        prefix = self.options["prefix"]
+        image_field = App._meta.get_field("app_image")
+        apps = []
+        for n in range(self.options["apps"]):
+            category = self.random.choice(list(CATEGORIES))
+            public_id = f"{prefix}/apps/app-{n}"
+            apps.append(App(
+                name=f"{prefix}-app-{n}", app_link=f"com.{prefix}.app{n}",
+                app_category=category, sub_category=self.random.choice(CATEGORIES[category]),
+                points=self.random.choice([5, 10, 20, 50, 100]),
+                app_image=public_id, app_image_url=resource_url(image_field.to_python(public_id)),
+            ))
+        apps = App.objects.bulk_create(apps, batch_size=self.options["chunk_size"])
+        self.progress("apps", len(apps))
+        return [(app.id, app.points) for app in apps]
+
+    def seed_tasks(self, user_ids, apps):
+        prefix, size = self.options["prefix"], self.options["chunk_size"]
+        screenshot_field = Task._meta.get_field("screenshot")
+        app_points = dict(apps)
+        statuses = self.random.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()), k=1000)
+        for start, stop in chunks(self.options["tasks"], size):
+            tasks, timestamps = [], []
+            for n in range(start, stop):
+                # Walk users first, then apps, so (user, app) pairs never repeat
+                app_id, points = apps[(n // len(user_ids)) % len(apps)]
+                public_id = f"{prefix}/screenshots/task-{n}"
+                status = statuses[n % len(statuses)]
+                created_at = self.created_at()
+                timestamps.append((created_at, created_at if status == "pending" else self.reviewed_at(created_at)))
+                tasks.append(Task(
+                    user_id=user_ids[n % len(user_ids)], app_id=app_id, status=status,
+                    screenshot=public_id, screenshot_url=resource_url(screenshot_field.to_python(public_id)),
+                    screenshot_hash=f"{self.random.getrandbits(64):016x}",
+                ))
+            with transaction.atomic():
+                # auto_now(_add) stamps everything with now() on insert; bulk_update
+                # skips pre_save, so it writes the made-up history back as is
+                tasks = Task.objects.bulk_create(tasks)
+                for task, (created_at, updated_at) in zip(tasks, timestamps):
+                    task.created_at, task.updated_at = created_at, updated_at
+                Task.objects.bulk_update(tasks, ["created_at", "updated_at"])
+                # Points are credited when the task is verified
+                ledger = PointsTransaction.objects.bulk_create([
+                    PointsTransaction(user_id=task.user_id, task_id=task.id, points=app_points[task.app_id])
+                    for task in tasks if task.status == "verified"
+                ])
+                PointsTransaction.objects.filter(id__in=[entry.id for entry in ledger]).update(
+                    created_at=Subquery(Task.objects.filter(id=OuterRef("task_id")).values("updated_at"))
+                )
+            self.progress("tasks", stop)
+
+    def seed_derived(self):
+        """Brings balances, counters, rollups and the leaderboard in line with the seeded rows."""
+        earned = PointsTransaction.objects.filter(user=OuterRef("pk")).values("user").annotate(total=Sum("points"))
+        AppUser.objects.filter(username__startswith=f"{self.options['prefix']}-user-").update(
+            points=Coalesce(Subquery(earned.values("total")), 0)
+        )
+        rebuild_counts()
+        today = timezone.localdate()
+        day = today - timedelta(days=self.options["days"])
+        while day <= today:
+            end = min(day + timedelta(days=6), today)
+            rebuild_stats(day, end)
+            day = end + timedelta(days=1)
+        leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS("Seeded data; balances, counters, stats and leaderboard rebuilt."))
+
+    def progress(self, label, count):
+        self.stdout.write(f"{label}: {count}")
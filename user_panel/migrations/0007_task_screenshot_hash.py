@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_panel', '0006_alter_task_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='user_panel.task'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='screenshot_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=16, null=True),
+        ),
+    ]
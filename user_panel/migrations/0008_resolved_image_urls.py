@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_panel', '0007_task_screenshot_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='screenshot_url',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def reject_duplicate_open_tasks(apps, schema_editor):
+    """
+    Keeps one open task per user and app so the constraint can be added:
+    the verified one (it has been credited), else the earliest.
+    """
+    Task = apps.get_model('user_panel', 'Task')
+    open_tasks = Task.objects.exclude(status='rejected').order_by(
+        models.Case(models.When(status='verified', then=0), default=1), 'created_at', 'id'
+    )
+    seen = set()
+    duplicates = []
+    for task_id, user_id, app_id, status in open_tasks.values_list('id', 'user_id', 'app_id', 'status').iterator():
+        if (user_id, app_id) in seen:
+            if status == 'verified':
+                raise RuntimeError(
+                    f"User {user_id} has more than one verified task for app {app_id}; "
+                    "resolve the duplicate credits before migrating."
+                )
+            duplicates.append(task_id)
+        seen.add((user_id, app_id))
+    Task.objects.filter(id__in=duplicates).update(status='rejected')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0003_app_live_index'),
+        ('user_panel', '0008_resolved_image_urls'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(reject_duplicate_open_tasks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'app', 'status'], name='task_user_app_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'rejected'), _negated=True), fields=('user', 'app'), name='task_one_open_per_user_app'),
+        ),
+    ]
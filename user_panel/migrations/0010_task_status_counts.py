@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-18 07:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_system', '0002_revokedtoken'),
+        ('user_panel', '0009_task_open_submission_constraint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskStatusCounts',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counts', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('uploading', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('submitted', models.PositiveIntegerField(default=0)),
+                ('verified', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
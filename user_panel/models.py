@@ -1,12 +1,15 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from cloudinary.models import CloudinaryField
 from django.contrib.auth import get_user_model
 from admin_panel.models import App
+from trustpoints_backend.media_urls import resource_url
 
 User = get_user_model()
 
 class Task(models.Model):
     STATUS_CHOICES = [
+        ('uploading', 'Uploading'),  # screenshot still being pushed to storage
         ('pending', 'Pending'),
         ('submitted', 'Submitted'),
         ('verified', 'Verified'),
@@ -17,12 +20,100 @@ class Task(models.Model):
     app = models.ForeignKey(App, on_delete=models.CASCADE)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     screenshot = CloudinaryField('screenshot', blank=True, null=True)
+    screenshot_url = models.CharField(max_length=500, blank=True, default='')  # resolved delivery URL
+    # Perceptual hash of the screenshot; equal hashes mean (near-)identical images
+    screenshot_hash = models.CharField(max_length=16, null=True, blank=True, db_index=True)
+    duplicate_of = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicates'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the admin queue, unfiltered and per filter
+            models.Index(fields=["created_at", "id"], name="task_created_idx"),
+            models.Index(fields=["status", "created_at", "id"], name="task_status_created_idx"),
+            models.Index(fields=["app", "created_at", "id"], name="task_app_created_idx"),
+            models.Index(fields=["user", "created_at", "id"], name="task_user_created_idx"),
+            # A user's tasks for an app, by status
+            models.Index(fields=["user", "app", "status"], name="task_user_app_status_idx"),
+        ]
+        constraints = [
+            # One open (not rejected) submission per user and app; rejected ones can be retried
+            models.UniqueConstraint(
+                fields=["user", "app"],
+                condition=~models.Q(status="rejected"),
+                name="task_one_open_per_user_app",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.app.name} ({self.status})"
+
+    def save(self, *args, **kwargs):
+        field = self._meta.get_field('screenshot')
+        self.screenshot_url = resource_url(field.to_python(self.screenshot)) or ''
+        super().save(*args, **kwargs)
+        if self.screenshot and not self.screenshot_url:
+            # A new file only gets its Cloudinary id while saving
+            self.screenshot_url = resource_url(self.screenshot) or ''
+            Task.objects.filter(pk=self.pk).update(screenshot_url=self.screenshot_url)
     
+class PointsTransaction(models.Model):
+    """
+    Ledger of points credited to users. A task can be credited at most once,
+    which the unique task column enforces at the database level.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="points_transactions")
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, related_name="points_transaction")
+    points = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user_id} +{self.points} (task {self.task_id})"
+
+class TaskStatusCounts(models.Model):
+    """
+    Number of tasks a user has in each status, kept current by
+    ``user_panel.counters`` as tasks move between statuses so the task
+    summary is a single-row read. ``manage.py reconcile_task_counts``
+    rebuilds it from the task table.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="task_counts")
+    uploading = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    submitted = models.PositiveIntegerField(default=0)
+    verified = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} task counts"
+
+class IdempotencyKey(models.Model):
+    """
+    Responses kept for replay under an ``Idempotency-Key`` header (see
+    ``user_panel.idempotency``). The unique constraint lets exactly one of
+    several concurrent requests with the same key run the view, whichever
+    worker they land on. ``prune_idempotency_keys`` deletes rows older than
+    ``IDEMPOTENCY_KEY_TTL``.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    view = models.CharField(max_length=100)
+    key = models.CharField(max_length=64)  # sha256 of the header value
+    fingerprint = models.CharField(max_length=64)
+    status = models.PositiveSmallIntegerField(null=True)  # null while the first request runs
+    data = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "view", "key"], name="idempotency_key_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.view} {self.key[:12]}"
+
 class UserPoints(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     total_points = models.PositiveIntegerField(default=0)
@@ -1,24 +1,38 @@
 from rest_framework import serializers
 from admin_panel.models import App
-import cloudinary.utils  # Import Cloudinary utilities
+from trustpoints_backend.media_urls import build_url, resource_url
+from trustpoints_backend.metrics import TimedSerializerMixin
 from .models import Task
 
-class AppSerializer(serializers.ModelSerializer):
+
+def app_image_url(app_image):
+    """Returns the full Cloudinary URL"""
+    if app_image:
+        return build_url(app_image.public_id)
+    return None  # Return None if no image is uploaded
+
+
+def stored_url(url, resource):
+    # URLs are persisted at save time; rows saved before that fall back to the memoized resolver
+    return url or resource_url(resource)
+
+
+class AppSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     app_image = serializers.SerializerMethodField()  # Override app_image
 
     class Meta:
         model = App
-        fields = '__all__'  # Return all fields
+        exclude = ['app_image_url']  # Return all fields (the resolved URL is served as app_image)
+
+        # Row fast path (see trustpoints_backend.rows): columns read by the method fields
+        row_fields = {"app_image": (["app_image"], app_image_url)}
 
     def get_app_image(self, obj):
-        """Returns the full Cloudinary URL"""
-        if obj.app_image:
-            return cloudinary.utils.cloudinary_url(obj.app_image.public_id)[0]
-        return None  # Return None if no image is uploaded
+        return app_image_url(obj.app_image)
     
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     app_name = serializers.CharField(source="app.name", read_only=True)
-    app_image = serializers.ImageField(source="app.app_image", read_only=True)  # Returns full URL
+    app_image = serializers.SerializerMethodField()  # Full Cloudinary URL of the app image
     screenshot = serializers.SerializerMethodField()  # Ensure full Cloudinary URL
     username = serializers.CharField(source="user.username", read_only=True)
     email = serializers.EmailField(source="user.email", read_only=True)
@@ -28,8 +42,21 @@ class TaskSerializer(serializers.ModelSerializer):
         fields = ["id", "app", "app_name", "app_image", "status", "screenshot", "created_at",  "username", "email"]
         read_only_fields = ["status", "created_at"]
 
+        # Query plan (see trustpoints_backend.query_plan): relations and columns read above
+        select_related = ["app", "user"]
+        only = [
+            "id", "app", "status", "screenshot", "screenshot_url", "created_at",
+            "app__name", "app__app_image", "app__app_image_url",
+            "user__username", "user__email",
+        ]
+        row_fields = {
+            "app_image": (["app__app_image_url", "app__app_image"], stored_url),
+            "screenshot": (["screenshot_url", "screenshot"], stored_url),
+        }
+
+    def get_app_image(self, obj):
+        return stored_url(obj.app.app_image_url, obj.app.app_image)
+
     def get_screenshot(self, obj):
-        if obj.screenshot:
-            return obj.screenshot.url  # Return Cloudinary full URL
-        return None
+        return stored_url(obj.screenshot_url, obj.screenshot)
         
@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from admin_panel.models import App
+from .catalog import invalidate_catalog
+
+
+@receiver(post_save, sender=App)
+@receiver(post_delete, sender=App)
+def app_changed(sender, **kwargs):
+    """
+    Any add, edit or (soft) delete of an app invalidates the cached catalog,
+    once committed: a rolled-back edit keeps the catalog, and a reader can't
+    cache pre-commit rows under the new version.
+    """
+    transaction.on_commit(invalidate_catalog)
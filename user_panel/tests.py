@@ -1,3 +1,1049 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+import tempfile
+import threading
+from unittest import mock
+from io import BytesIO, StringIO
+from pathlib import Path
 
-# Create your tests here.
+import cloudinary.utils
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from django.db.migrations.executor import MigrationExecutor
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from admin_panel.models import App
+from admin_panel.serializers import AdminTaskSerializer, AppSerializer as AdminAppSerializer
+from auth_system.models import AppUser
+from admin_panel.services import reject_task, verify_task
+from auth_system.tokens import bump_token_version, tokens_for_user
+from trustpoints_backend import media_urls, metrics, query_log, renderers
+from trustpoints_backend.db_router import ReplicaRouter, replica_reads
+from trustpoints_backend.query_plan import apply_query_plan
+from trustpoints_backend.renderers import FastJSONRenderer
+from trustpoints_backend.rows import RowMapper
+from .async_views import AsyncAppDetailView, AsyncAppListView, AsyncTaskDetailView, AsyncUserTasksListView
+from .counters import rebuild_counts
+from .leaderboard import Leaderboard, SortedRanking, leaderboard
+from .models import IdempotencyKey, PointsTransaction, Task, TaskStatusCounts
+from .serializers import AppSerializer, TaskSerializer
+from . import uploads
+from .uploads import ScreenshotStorage, claim_spool, process_upload, spool_path
+
+
+def create_app(name, points=10):
+    return App.objects.create(
+        name=name,
+        app_link=f"com.example.{name.lower()}",
+        app_category="Social",
+        sub_category="Chat",
+        points=points,
+        app_image=f"apps/{name.lower()}",
+    )
+
+
+def make_screenshot(name="shot.png", size=(64, 128), color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class UserTasksListViewTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(username="alice", email="alice@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_tasks(self, count):
+        for i in range(count):
+            app = create_app(f"App{Task.objects.count()}")
+            Task.objects.create(user=self.user, app=app, screenshot=f"shots/{app.id}")
+
+    def test_lists_task_relations(self):
+        self.create_tasks(1)
+        response = self.client.get("/user_panel/tasks/")
+        self.assertEqual(response.status_code, 200)
+        task = response.json()[0]
+        self.assertEqual(task["app_name"], "App0")
+        self.assertEqual(task["username"], "alice")
+        self.assertEqual(task["email"], "alice@example.com")
+        self.assertIn("apps/app0", task["app_image"])
+        self.assertIn("shots/", task["screenshot"])
+
+    def test_query_count_is_constant(self):
+        self.create_tasks(1)
+        with self.assertNumQueries(1):
+            self.client.get("/user_panel/tasks/")
+
+        self.create_tasks(10)
+        with self.assertNumQueries(1):
+            response = self.client.get("/user_panel/tasks/")
+        self.assertEqual(len(response.json()), 11)
+
+    def test_urls_are_persisted_and_match_cloudinary(self):
+        self.create_tasks(1)
+        task = Task.objects.select_related("app").get()
+        self.assertEqual(task.app.app_image_url, task.app.app_image.url)
+        self.assertEqual(task.screenshot_url, task.screenshot.url)
+
+        with mock.patch("cloudinary.utils.cloudinary_url") as cloudinary_url:
+            task = self.client.get("/user_panel/tasks/").json()[0]
+        cloudinary_url.assert_not_called()
+        self.assertEqual(task["app_image"], Task.objects.get().app.app_image.url)
+
+    def test_detail_uses_single_query(self):
+        self.create_tasks(1)
+        task = Task.objects.get()
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/user_panel/task/{task.id}/")
+        self.assertEqual(response.json()["app_name"], "App0")
+
+
+class AppListViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = AppUser.objects.create(username="alice")
+        self.admin = AppUser.objects.create(username="admin", role="admin", is_admin=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.app = create_app("Chat")
+
+    def test_catalog_is_served_from_cache(self):
+        response = self.client.get("/user_panel/apps/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([app["name"] for app in response.json()], ["Chat"])
+        self.assertIn("apps/chat", response.json()[0]["app_image"])
+
+        with self.assertNumQueries(0):
+            cached = self.client.get("/user_panel/apps/")
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached["ETag"], response["ETag"])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get("/user_panel/apps/")["ETag"]
+
+        response = self.client.get("/user_panel/apps/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get("/user_panel/apps/", HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_admin_changes_invalidate_catalog(self):
+        etag = self.client.get("/user_panel/apps/")["ETag"]
+        admin_client = APIClient()
+        admin_client.force_authenticate(self.admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            admin_client.patch(f"/admin_panel/apps/{self.app.id}/edit/", {"points": 99}, format="json")
+        response = self.client.get("/user_panel/apps/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["points"], 99)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            admin_client.delete(f"/admin_panel/apps/{self.app.id}/delete/")
+        self.assertEqual(self.client.get("/user_panel/apps/").json(), [])
+
+    def test_invalidation_waits_for_commit(self):
+        etag = self.client.get("/user_panel/apps/")["ETag"]
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.app.points = 99
+            self.app.save()
+            # Not committed yet: readers still get the old version
+            self.assertEqual(self.client.get("/user_panel/apps/")["ETag"], etag)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertNotEqual(self.client.get("/user_panel/apps/")["ETag"], etag)
+
+    def test_deploy_check_requires_shared_cache(self):
+        from trustpoints_backend.checks import check_shared_cache
+
+        self.assertEqual([error.id for error in check_shared_cache(None)], ["trustpoints_backend.E001"])
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://x"}}
+        with override_settings(CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = AppUser.objects.create(username="alice", email="alice@example.com")
+        self.app = create_app("Chat")
+        self.task = Task.objects.create(user=self.user, app=self.app, screenshot="shots/1")
+        self.auth = f"Bearer {tokens_for_user(self.user).access_token}"
+        self.factory = AsyncRequestFactory()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=self.auth)
+
+    async def call(self, view, path, **kwargs):
+        request = self.factory.get(path, headers={"Authorization": self.auth})
+        return await view.as_view()(request, **kwargs)
+
+    async def test_responses_match_sync_views(self):
+        cases = [
+            (AsyncAppListView, "/user_panel/apps/", {}),
+            (AsyncAppDetailView, f"/user_panel/app/{self.app.id}/", {"pk": self.app.id}),
+            (AsyncUserTasksListView, "/user_panel/tasks/", {}),
+            (AsyncTaskDetailView, f"/user_panel/task/{self.task.id}/", {"pk": self.task.id}),
+        ]
+        for view, path, kwargs in cases:
+            with self.subTest(path=path):
+                expected = await sync_to_async(self.client.get)(path)
+                response = await self.call(view, path, **kwargs)
+                self.assertEqual(response.status_code, 200, response.content)
+                self.assertEqual(response.content, expected.content)
+
+    async def test_revoked_tokens_rejected_with_cold_cache(self):
+        await sync_to_async(bump_token_version)(self.user.id)
+        await cache.aclear()
+        response = await self.call(AsyncUserTasksListView, "/user_panel/tasks/")
+        self.assertEqual(response.status_code, 401)
+
+    async def test_token_version_is_read_from_primary(self):
+        await cache.aclear()
+        routed = []
+        route = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            routed.append((model.__name__, route(router, model, **hints)))
+            return "default"
+
+        with mock.patch("trustpoints_backend.db_router.replica_aliases", return_value=["replica_0"]), \
+                mock.patch.object(ReplicaRouter, "db_for_read", record):
+            response = await self.call(AsyncUserTasksListView, "/user_panel/tasks/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([alias for model, alias in routed if model == "TokenVersion"], ["default"])
+        self.assertIn(("Task", "replica_0"), routed)
+
+    async def test_catalog_etag_returns_304(self):
+        etag = (await self.call(AsyncAppListView, "/user_panel/apps/"))["ETag"]
+        request = self.factory.get("/user_panel/apps/", headers={"Authorization": self.auth, "If-None-Match": etag})
+        response = await AsyncAppListView.as_view()(request)
+        self.assertEqual(response.status_code, 304)
+
+    async def test_missing_credentials_return_401(self):
+        response = await AsyncUserTasksListView.as_view()(self.factory.get("/user_panel/tasks/"))
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(json.loads(response.content), {"detail": "Authentication credentials were not provided."})
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+
+    async def test_unknown_pk_returns_404(self):
+        response = await self.call(AsyncTaskDetailView, "/user_panel/task/0/", pk=0)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {"detail": "No Task matches the given query."})
+
+
+class TaskSummaryViewTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(username="alice")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def summary(self):
+        response = self.client.get("/user_panel/tasks/summary/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_counters_follow_task_lifecycle(self):
+        tasks = [Task.objects.create(user=self.user, app=create_app(f"App{i}")) for i in range(3)]
+        self.assertEqual(self.summary()["pending"], 3)  # built on first read
+
+        verify_task(Task.objects.select_related("app").get(id=tasks[0].id))
+        reject_task(tasks[1])
+        with self.assertNumQueries(1):
+            summary = self.summary()
+        self.assertEqual(summary, {
+            "uploading": 0, "pending": 1, "submitted": 0, "verified": 1, "rejected": 1, "total": 3,
+        })
+
+    def test_reconcile_command_repairs_drift(self):
+        Task.objects.create(user=self.user, app=create_app("Chat"))
+        rebuild_counts()
+        TaskStatusCounts.objects.update(pending=7, verified=2)
+
+        call_command("reconcile_task_counts", stdout=StringIO())
+        self.assertEqual(self.summary()["pending"], 1)
+        self.assertEqual(self.summary()["verified"], 0)
+
+
+class SeedDataCommandTests(TestCase):
+    def test_seeds_consistent_rows(self):
+        call_command("seed_data", users=5, apps=3, tasks=12, chunk_size=4, stdout=StringIO())
+
+        self.assertEqual(AppUser.objects.filter(username__startswith="seed-user-").count(), 5)
+        self.assertEqual(App.objects.count(), 3)
+        self.assertEqual(Task.objects.count(), 12)
+        self.assertEqual(Task.objects.values("user_id", "app_id").distinct().count(), 12)
+        self.assertIn("seed/apps/app-0", App.objects.get(name="seed-app-0").app_image_url)
+
+        verified = Task.objects.filter(status="verified")
+        self.assertEqual(PointsTransaction.objects.count(), verified.count())
+        self.assertEqual(
+            sum(AppUser.objects.values_list("points", flat=True)),
+            sum(PointsTransaction.objects.values_list("points", flat=True)),
+        )
+        self.assertEqual(sum(TaskStatusCounts.objects.values_list("verified", flat=True)), verified.count())
+
+    def test_seeded_history_is_in_the_past(self):
+        call_command("seed_data", users=20, apps=10, tasks=200, days=30, stdout=StringIO())
+
+        self.assertFalse(Task.objects.filter(updated_at__gt=timezone.now()).exists())
+        self.assertFalse(Task.objects.filter(updated_at__lt=F("created_at")).exists())
+        self.assertFalse(Task.objects.filter(status="pending").exclude(updated_at=F("created_at")).exists())
+        for entry in PointsTransaction.objects.select_related("task"):
+            self.assertEqual(entry.created_at, entry.task.updated_at)
+        # Rejections are spread over their review days, not piled on today
+        rejected_today = Task.objects.filter(status="rejected", updated_at__date=timezone.localdate()).count()
+        self.assertLess(rejected_today, Task.objects.filter(status="rejected").count() / 2)
+        self.assertTrue(Task._meta.get_field("created_at").auto_now_add)
+
+    def test_rejects_more_tasks_than_pairs(self):
+        stderr = StringIO()
+        call_command("seed_data", users=2, apps=2, tasks=5, stdout=StringIO(), stderr=stderr)
+        self.assertFalse(Task.objects.exists())
+        self.assertIn("may not exceed", stderr.getvalue())
+
+
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        self.user = AppUser.objects.create(username="alice")
+        self.app = create_app("Chat")
+
+    def test_open_task_lookup_uses_constraint_index(self):
+        plan = Task.objects.filter(user=self.user, app=self.app).exclude(status="rejected").explain()
+        self.assertIn("task_one_open_per_user_app", plan)
+        plan = Task.objects.filter(user=self.user, app=self.app, status="verified").explain()
+        self.assertIn("task_user_app_status_idx", plan)
+
+    def test_live_apps_use_partial_index(self):
+        self.assertIn("app_live_idx", App.objects.filter(is_deleted=False).explain())
+
+    def test_one_open_task_per_user_and_app(self):
+        from django.db import IntegrityError, transaction
+
+        Task.objects.create(user=self.user, app=self.app, status="rejected")
+        Task.objects.create(user=self.user, app=self.app)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Task.objects.create(user=self.user, app=self.app, status="verified")
+
+
+class OpenTaskMigrationTests(TransactionTestCase):
+    """The data migration in front of ``task_one_open_per_user_app``."""
+    before = [("user_panel", "0008_resolved_image_urls")]
+    after = [("user_panel", "0009_task_open_submission_constraint")]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.before)
+        self.executor.loader.build_graph()
+        self.apps = self.executor.loader.project_state(self.before).apps
+        self.addCleanup(self.migrate_to_latest)
+
+    def migrate_to_latest(self):
+        Task.objects.all().delete()  # the duplicates a failed migration left behind
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def create_tasks(self, *statuses):
+        Task = self.apps.get_model("user_panel", "Task")
+        user = AppUser.objects.create(username="alice")
+        app = create_app("Chat")
+        return [Task.objects.create(user_id=user.id, app_id=app.id, status=status).id for status in statuses]
+
+    def migrate_forward(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+
+    def test_verified_task_is_kept(self):
+        pending, verified = self.create_tasks("pending", "verified")
+        self.migrate_forward()
+        statuses = dict(Task.objects.values_list("id", "status"))
+        self.assertEqual(statuses, {pending: "rejected", verified: "verified"})
+
+    def test_two_verified_tasks_stop_the_migration(self):
+        self.create_tasks("verified", "verified")
+        with self.assertRaisesMessage(RuntimeError, "more than one verified task"):
+            self.migrate_forward()
+
+
+class DatabaseRoutingTests(TestCase):
+    def test_reads_use_replicas_only_when_opted_in(self):
+        router = ReplicaRouter()
+        with mock.patch("trustpoints_backend.db_router.replica_aliases", return_value=["replica_0"]):
+            self.assertEqual(router.db_for_read(Task), "default")
+            with replica_reads():
+                self.assertEqual(router.db_for_read(Task), "replica_0")
+                self.assertEqual(router.db_for_write(Task), "default")
+            self.assertEqual(router.db_for_read(Task), "default")
+
+    def test_read_views_route_to_replicas(self):
+        user = AppUser.objects.create(username="alice")
+        client = APIClient()
+        client.force_authenticate(user)
+        routed = []
+        route = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            # Record the alias each read would use, but run it on the test database
+            routed.append(route(router, model, **hints))
+            return "default"
+
+        with mock.patch("trustpoints_backend.db_router.replica_aliases", return_value=["replica_0"]), \
+                mock.patch.object(ReplicaRouter, "db_for_read", record):
+            client.get("/user_panel/tasks/")
+            self.assertEqual(set(routed), {"replica_0"})
+
+            routed.clear()
+            Task.objects.count()
+            self.assertEqual(routed, ["default"])
+
+    def test_cached_and_stored_reads_use_primary(self):
+        user = AppUser.objects.create(username="alice")
+        create_app("Chat")
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(user)
+        routed = []
+        route = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            routed.append((model.__name__, route(router, model, **hints)))
+            return "default"
+
+        with mock.patch("trustpoints_backend.db_router.replica_aliases", return_value=["replica_0"]), \
+                mock.patch.object(ReplicaRouter, "db_for_read", record):
+            client.get("/user_panel/apps/")  # catalog miss: rendered and cached
+            self.assertEqual(routed, [("App", "default")])
+
+            routed.clear()
+            client.get("/user_panel/tasks/summary/")  # no counts row yet: rebuilt and stored
+            self.assertEqual(routed[0], ("TaskStatusCounts", "replica_0"))
+            self.assertEqual({alias for _, alias in routed[1:]}, {"default"})
+
+    def test_token_version_is_read_from_primary(self):
+        user = AppUser.objects.create(username="alice")
+        token = tokens_for_user(user).access_token
+        cache.clear()
+        routed = []
+        route = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            routed.append((model.__name__, route(router, model, **hints)))
+            return "default"
+
+        with mock.patch("trustpoints_backend.db_router.replica_aliases", return_value=["replica_0"]), \
+                mock.patch.object(ReplicaRouter, "db_for_read", record):
+            response = APIClient().get("/user_panel/tasks/summary/", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([alias for model, alias in routed if model == "TokenVersion"], ["default"])
+
+
+    def test_sqlite_profile_is_tuned(self):
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+
+@override_settings(PERF_SAMPLE_RATE=1.0, METRICS_TOKEN="scrape-me")
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        metrics.registry.clear()
+        query_log.query_stats.clear()
+        self.user = AppUser.objects.create(username="alice")
+        self.admin = AppUser.objects.create(username="admin", role="admin", is_admin=True)
+        Task.objects.create(user=self.user, app=create_app("Chat"), screenshot="shots/1")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def scrape(self):
+        return self.client.get("/metrics", headers={"Authorization": "Bearer scrape-me"}).content.decode()
+
+    def test_server_timing_and_histograms(self):
+        self.assertNotIn("Server-Timing", self.client.get("/user_panel/tasks/"))
+
+        self.client.force_authenticate(self.admin)
+        timing = self.client.get("/admin_panel/tasks/")["Server-Timing"]
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="1 queries", serialize;dur=[\d.]+, total;dur=[\d.]+$')
+
+        text = self.scrape()
+        self.assertIn('http_request_duration_seconds_count{view="user_panel/tasks/",method="GET"} 1', text)
+        self.assertIn('http_request_db_queries_bucket{view="user_panel/tasks/",method="GET",le="1"} 1', text)
+        self.assertIn("# TYPE http_request_storage_seconds histogram", text)
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_for_everyone_in_debug(self):
+        self.assertIn("Server-Timing", self.client.get("/user_panel/tasks/"))
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_timed(self):
+        response = self.client.get("/user_panel/tasks/")
+        self.assertNotIn("Server-Timing", response)
+        self.assertNotIn("user_panel/tasks/", self.scrape())
+
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer scrape-me"}).status_code, 200)
+        with override_settings(METRICS_TOKEN=""):
+            self.assertEqual(self.client.get("/metrics", headers={"Authorization": "Bearer "}).status_code, 403)
+
+    def test_serialization_is_timed_apart_from_queries(self):
+        timings = metrics.RequestTimings()
+        token = metrics.current_timings.set(timings)
+        try:
+            mapper = RowMapper.for_serializer(TaskSerializer)
+            self.assertEqual(len(mapper.to_representation(mapper.values(Task.objects.all()))), 1)
+            self.assertEqual(timings.queries, 1)
+            self.assertGreater(timings.phases["serialize"], 0)
+
+            timings.phases.pop("serialize")
+            TaskSerializer(Task.objects.select_related("app", "user"), many=True).data
+            self.assertGreater(timings.phases["serialize"], 0)
+
+            # Query time inside the block, and nested blocks, are not counted again
+            timings.phases.pop("serialize")
+            with metrics.timed("serialize"), metrics.timed("serialize"):
+                timings.add("db", 1.0)
+            self.assertLess(timings.phases["serialize"], 0.5)
+        finally:
+            metrics.current_timings.reset(token)
+
+    def test_cloudinary_upload_is_timed_as_storage(self):
+        from cloudinary import CloudinaryResource
+
+        timings = metrics.RequestTimings()
+        token = metrics.current_timings.set(timings)
+        try:
+            with mock.patch("cloudinary.uploader.upload_resource", return_value=CloudinaryResource(
+                "apps/new", format="png", version=1, type="upload", resource_type="image",
+            )) as upload:
+                app = create_app("Mail")
+                app.app_image = make_screenshot()
+                app.save()
+        finally:
+            metrics.current_timings.reset(token)
+        upload.assert_called_once()
+        self.assertIn("storage", timings.phases)
+        self.assertIn("apps/new", App.objects.get(id=app.id).app_image_url)
+
+
+class QueryLogTests(TestCase):
+    def setUp(self):
+        query_log.query_stats.clear()
+        self.users = [AppUser.objects.create(username=f"user{i}") for i in range(6)]
+
+    def test_fingerprint_normalizes_literals_and_lists(self):
+        first = query_log.fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s) AND "name" = \'a\' LIMIT 21')
+        second = query_log.fingerprint('SELECT * FROM "t" WHERE "id" IN (%s)  AND "name" = \'b\' LIMIT 5')
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], 'SELECT * FROM "t" WHERE "id" IN (...) AND "name" = ? LIMIT ?')
+
+    def test_repeated_query_is_flagged_as_n_plus_one(self):
+        timings = metrics.RequestTimings()
+        token = metrics.current_timings.set(timings)
+        try:
+            for user in self.users:
+                AppUser.objects.get(id=user.id)  # per-row lookups
+        finally:
+            metrics.current_timings.reset(token)
+
+        with self.assertLogs("trustpoints_backend.queries", "WARNING") as logs:
+            metrics.record_request("user_panel/tasks/", "GET", 0.01, timings)
+        self.assertIn("Possible N+1 in user_panel/tasks/: 6 identical queries", logs.output[0])
+
+        (view, _, sql, calls, _, n_plus_one), = query_log.query_stats.snapshot()
+        self.assertEqual((view, calls, n_plus_one), ("user_panel/tasks/", 6, 1))
+        self.assertIn('FROM "auth_system_appuser"', sql)
+        self.assertIn("db_query_n_plus_one_total", metrics.render_query_stats())
+
+    def test_slow_query_is_logged_with_plan(self):
+        with mock.patch.object(query_log, "is_slow", side_effect=lambda seconds: not query_log._explaining.get()), \
+                self.assertLogs("trustpoints_backend.queries", "WARNING") as logs:
+            list(AppUser.objects.filter(username="user1"))
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Slow query", logs.output[0])
+        self.assertIn("auth_system_appuser", logs.output[0].split("plan:")[1])
+        self.assertNotIn("user1", logs.output[0])  # parameters stay out of the log
+
+    def test_failed_explain_runs_in_savepoint(self):
+        with mock.patch.object(query_log, "is_slow", side_effect=lambda seconds: not query_log._explaining.get()), \
+                mock.patch.object(connection.ops, "explain_query_prefix", return_value="EXPLAIN NONSENSE"), \
+                self.assertLogs("trustpoints_backend.queries", "WARNING") as logs, \
+                CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                list(AppUser.objects.filter(username="user1"))
+                self.assertEqual(AppUser.objects.filter(username="user2").count(), 1)
+        self.assertIn("(not available)", logs.output[0])
+        self.assertTrue(any(query["sql"].startswith("ROLLBACK TO SAVEPOINT") for query in queries.captured_queries))
+
+
+class MediaUrlTests(TestCase):
+    def test_build_url_is_memoized(self):
+        media_urls.clear_cache()
+        first = media_urls.build_url("apps/chat", width=100, crop="fill")
+        with mock.patch("cloudinary.utils.cloudinary_url") as cloudinary_url:
+            self.assertEqual(media_urls.build_url("apps/chat", crop="fill", width=100), first)
+        cloudinary_url.assert_not_called()
+
+    def test_build_url_with_transformation(self):
+        media_urls.clear_cache()
+        for transformation in ({"width": 100, "crop": "fill"}, [{"width": 100}, {"angle": 90}]):
+            with self.subTest(transformation=transformation):
+                expected = cloudinary.utils.cloudinary_url("apps/chat", transformation=transformation)[0]
+                self.assertEqual(media_urls.build_url("apps/chat", transformation=transformation), expected)
+                with mock.patch("cloudinary.utils.cloudinary_url") as cloudinary_url:
+                    self.assertEqual(media_urls.build_url("apps/chat", transformation=transformation), expected)
+                cloudinary_url.assert_not_called()
+
+    def test_resource_url_matches_resource(self):
+        resource = Task._meta.get_field("screenshot").to_python("image/upload/v123/shots/a.webp")
+        self.assertEqual(media_urls.resource_url(resource), resource.url)
+        self.assertIsNone(media_urls.resource_url(None))
+
+
+class RowParityTests(TestCase):
+    """The row fast path must produce the serializers' exact bytes."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = AppUser.objects.create(username="admin", role="admin", is_admin=True)
+        self.user = AppUser.objects.create(username="zoë", email="zoe@example.com")
+        cafe = create_app("Café ☕", points=0)
+        App.objects.filter(pk=cafe.pk).update(created_by_id=self.admin.id, created_by_name="Admin \u2028 \"One\"")
+        plain = create_app("Plain")
+        App.objects.filter(pk=plain.pk).update(app_image_url="")  # saved before URLs were persisted
+        create_app("Gone").soft_delete()
+
+        first = Task.objects.create(user=self.user, app=cafe, screenshot="shots/one", status="submitted")
+        Task.objects.create(user=self.user, app=plain, screenshot="shots/two", duplicate_of=first)
+        other = AppUser.objects.create(username="bob", email="")
+        Task.objects.create(user=other, app=cafe, status="rejected")
+        Task.objects.filter(user=other).update(screenshot_url="")
+
+    def assertParity(self, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(apply_query_plan(queryset, serializer_class), many=True).data)
+        rows = RowMapper.for_serializer(serializer_class).serialize(queryset)
+        self.assertEqual(FastJSONRenderer().render(rows), expected)
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(FastJSONRenderer().render(rows), expected)
+        return expected
+
+    def test_serializers(self):
+        body = self.assertParity(AppSerializer, App.objects.all())
+        self.assertIn("Café ☕".encode(), body)
+        self.assertIn(b"\\u2028", body)
+        self.assertParity(AdminAppSerializer, App.objects.all())
+        self.assertParity(TaskSerializer, Task.objects.all())
+        self.assertParity(AdminTaskSerializer, Task.objects.all())
+
+    @override_settings(TIME_ZONE="Asia/Kolkata")
+    def test_datetimes_in_local_time_zone(self):
+        self.assertIn(b"+05:30", self.assertParity(TaskSerializer, Task.objects.all()))
+
+    @override_settings(REST_FRAMEWORK={"DATETIME_FORMAT": "%d/%m/%Y %H:%M"})
+    def test_custom_datetime_format(self):
+        self.assertParity(AdminTaskSerializer, Task.objects.all())
+
+    def test_endpoints(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assertEqual(
+            client.get("/user_panel/apps/").content,
+            JSONRenderer().render(AppSerializer(App.objects.filter(is_deleted=False), many=True).data),
+        )
+        self.assertEqual(
+            client.get("/user_panel/tasks/").content,
+            JSONRenderer().render(TaskSerializer(Task.objects.filter(user=self.user), many=True).data),
+        )
+
+        client.force_authenticate(self.admin)
+        self.assertEqual(
+            client.get("/admin_panel/all-apps/").content,
+            JSONRenderer().render(AdminAppSerializer(App.objects.filter(is_deleted=False), many=True).data),
+        )
+        tasks = Task.objects.order_by("created_at", "id")
+        response = client.get("/admin_panel/tasks/?page_size=2")
+        self.assertEqual(
+            json.loads(response.content)["results"],
+            json.loads(JSONRenderer().render(AdminTaskSerializer(tasks[:2], many=True).data)),
+        )
+        response = client.get(json.loads(response.content)["next"])
+        self.assertEqual(
+            response.content,
+            JSONRenderer().render({"next": None, "results": AdminTaskSerializer(tasks[2:], many=True).data}),
+        )
+
+    def test_method_fields_must_declare_columns(self):
+        class Undeclared(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = App
+                fields = ["id", "label"]
+
+        with self.assertRaises(ImproperlyConfigured):
+            RowMapper(Undeclared)
+
+    def test_renderer_falls_back_for_payloads_orjson_rejects(self):
+        data = {"big": 2 ** 70, 1: "int key"}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class SortedRankingTests(TestCase):
+    def test_ranks_and_updates(self):
+        ranking = SortedRanking([(1, 50), (2, 80), (3, 50), (4, 10)])
+        self.assertEqual(ranking.top(3), [(1, 2, 80), (2, 1, 50), (2, 3, 50)])
+        self.assertEqual([ranking.rank(uid) for uid in (1, 2, 3, 4)], [2, 1, 2, 4])
+        self.assertIsNone(ranking.rank(5))
+
+        ranking.update(4, 90)
+        ranking.update(5, 0)
+        self.assertEqual(ranking.top(2), [(1, 4, 90), (2, 2, 80)])
+        self.assertEqual(ranking.rank(5), 5)
+        self.assertEqual(len(ranking), 5)
+
+
+class LeaderboardViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [AppUser.objects.create(username=f"user{i}", points=10 * i) for i in range(5)]
+        AppUser.objects.create(username="admin", role="admin", is_admin=True, points=1000)
+        leaderboard.rebuild()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[1])
+
+    def test_top_excludes_admins(self):
+        response = self.client.get("/user_panel/leaderboard/?limit=3")
+        self.assertEqual(response.json(), [
+            {"rank": 1, "user_id": self.users[4].id, "username": "user4", "points": 40},
+            {"rank": 2, "user_id": self.users[3].id, "username": "user3", "points": 30},
+            {"rank": 3, "user_id": self.users[2].id, "username": "user2", "points": 20},
+        ])
+        self.assertEqual(self.client.get("/user_panel/leaderboard/?limit=x").status_code, 400)
+
+    def test_my_rank(self):
+        with self.assertNumQueries(0):
+            response = self.client.get("/user_panel/leaderboard/me/")
+        self.assertEqual(response.json(), {"rank": 4, "points": 10, "total_users": 5})
+
+    def test_verification_updates_rank_incrementally(self):
+        admin = AppUser.objects.get(username="admin")
+        task = Task.objects.create(user=self.users[1], app=create_app("Chat", points=100), screenshot="shots/1")
+        admin_client = APIClient()
+        admin_client.force_authenticate(admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            admin_client.put(f"/admin_panel/tasks/{task.id}/verify/")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/user_panel/leaderboard/me/")
+        self.assertEqual(response.json(), {"rank": 1, "points": 110, "total_users": 5})
+
+    def test_admin_credits_are_not_ranked(self):
+        admin = AppUser.objects.get(username="admin")
+        task = Task.objects.create(user=admin, app=create_app("Chat", points=100), screenshot="shots/1")
+        with self.captureOnCommitCallbacks(execute=True):
+            verify_task(Task.objects.select_related("app").get(id=task.id))
+        self.assertEqual(leaderboard.rank(self.users[4].id)[0], 1)
+        self.assertEqual(len(leaderboard.top(10)), 5)
+
+    def test_reload_does_not_block_readers(self):
+        board = Leaderboard()
+        board.rebuild()
+        board._loaded_at = 0.0  # stale: the next read reloads
+        loading, release = threading.Event(), threading.Event()
+        rows = list(board._fetch())
+
+        def slow_fetch():
+            loading.set()
+            release.wait(5)
+            return rows
+
+        with mock.patch.object(board, "_fetch", slow_fetch):
+            reloader = threading.Thread(target=board.top, args=(1,))
+            reloader.start()
+            loading.wait(5)
+            # Served from the old ranking while the reload is running
+            self.assertEqual(board.top(1), [(1, self.users[4].id, 40)])
+            board.record(self.users[0].id, 999)
+            release.set()
+            reloader.join(5)
+
+        # Credits recorded during the reload survive the swap
+        self.assertEqual(board.top(1), [(1, self.users[0].id, 999)])
+
+    def test_rebuild_command(self):
+        AppUser.objects.filter(id=self.users[0].id).update(points=500)
+        out = StringIO()
+        call_command("rebuild_leaderboard", stdout=out)
+        self.assertIn("5 users", out.getvalue())
+        self.assertEqual(self.client.get("/user_panel/leaderboard/?limit=1").json()[0]["username"], "user0")
+
+
+class FailingStorage(ScreenshotStorage):
+    def save(self, path, name):
+        raise OSError("storage is down")
+
+
+class SubmitTaskViewTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(
+            SCREENSHOT_STORAGE_BACKEND="user_panel.uploads.LocalScreenshotStorage",
+            SCREENSHOT_SPOOL_DIR=f"{self.tmp.name}/spool",
+            SCREENSHOT_LOCAL_STORAGE_DIR=f"{self.tmp.name}/media",
+            SCREENSHOT_UPLOAD_WORKERS=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = AppUser.objects.create(username="alice")
+        self.app = create_app("Chat")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def submit(self, screenshot=None, app=None, **headers):
+        return self.client.post("/user_panel/tasks/submit/", {
+            "app": (app or self.app).id,
+            "screenshot": screenshot or make_screenshot(),
+        }, headers=headers)
+
+    @override_settings(SCREENSHOT_MAX_DIMENSION=100)
+    def test_screenshot_is_downscaled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit(make_screenshot(size=(300, 600)))
+        task = Task.objects.get()
+        with Image.open(Path(self.tmp.name) / "media" / f"task-{task.id}.webp") as image:
+            self.assertEqual(image.size, (50, 100))
+
+    def test_resubmitted_screenshot_is_flagged(self):
+        other = AppUser.objects.create(username="bob")
+        gradient = Image.linear_gradient("L").convert("RGB")
+
+        def screenshot(size, image_format):
+            buffer = BytesIO()
+            gradient.resize(size).save(buffer, format=image_format)
+            return SimpleUploadedFile(f"shot.{image_format.lower()}", buffer.getvalue())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit(screenshot((256, 256), "PNG"))
+        # Another user sends a rescaled, re-encoded copy for a different app
+        self.client.force_authenticate(other)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit(screenshot((180, 180), "JPEG"), app=create_app("Mail"))
+
+        first, second = Task.objects.order_by("id")
+        self.assertEqual(first.screenshot_hash, second.screenshot_hash)
+        self.assertIsNone(first.duplicate_of_id)
+        self.assertEqual(second.duplicate_of_id, first.id)
+
+    def test_duplicate_is_flagged_whichever_upload_finishes_first(self):
+        with self.captureOnCommitCallbacks(execute=False) as first_upload:
+            self.submit()
+        mail = create_app("Mail")
+        self.client.force_authenticate(AppUser.objects.create(username="bob"))
+        with self.captureOnCommitCallbacks(execute=False) as second_upload:
+            self.submit(app=mail)
+
+        # The later submission is stored before the earlier one has its hash
+        second_upload[0]()
+        first_upload[0]()
+        first, second = Task.objects.order_by("id")
+        self.assertIsNone(first.duplicate_of_id)
+        self.assertEqual(second.duplicate_of_id, first.id)
+
+    def test_non_image_is_rejected(self):
+        response = self.submit(SimpleUploadedFile("shot.png", b"not an image"))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.exists())
+
+    def test_submission_returns_before_upload(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.submit()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["status"], "uploading")
+        self.assertIsNone(response.json()["screenshot"])
+        task = Task.objects.get()
+        self.assertTrue(spool_path(task.id).exists())
+        self.assertEqual(len(callbacks), 1)
+
+        self.assertEqual(TaskStatusCounts.objects.get(user=self.user).uploading, 1)
+
+        callbacks[0]()
+        task.refresh_from_db()
+        self.assertEqual(task.status, "pending")
+        counts = TaskStatusCounts.objects.get(user=self.user)
+        self.assertEqual((counts.uploading, counts.pending), (0, 1))
+        self.assertIn(f"task-{task.id}", task.screenshot.public_id)
+        self.assertFalse(spool_path(task.id).exists())
+        stored = Path(self.tmp.name) / "media" / f"task-{task.id}.webp"
+        with Image.open(stored) as image:
+            self.assertEqual(image.format, "WEBP")
+        self.assertEqual(len(task.screenshot_hash), 16)
+        self.assertIsNone(task.duplicate_of)
+
+    def test_duplicate_submission_rejected(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.submit().status_code, 201)
+        self.assertEqual(self.submit().status_code, 400)
+        # The rejected submission's spooled copy is cleaned up
+        self.assertEqual(list(Path(self.tmp.name, "spool").iterdir()), [])
+
+    def test_screenshot_is_spooled_outside_the_transaction(self):
+        depths = []
+        original = uploads.spool_screenshot
+
+        def spool(uploaded_file):
+            depths.append(len(connection.atomic_blocks))
+            return original(uploaded_file)
+
+        with mock.patch("user_panel.views.spool_screenshot", spool), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.submit().status_code, 201)
+        self.assertEqual(depths, [len(connection.atomic_blocks)])
+        self.assertEqual(Task.objects.get().status, "pending")
+
+    def test_lost_spool_file_rejects_the_task(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            self.submit()
+        task = Task.objects.get()
+        spool_path(task.id).unlink()
+
+        call_command("resume_uploads", stdout=StringIO(), stderr=StringIO())
+        task.refresh_from_db()
+        self.assertEqual(task.status, "rejected")
+        counts = TaskStatusCounts.objects.get(user=self.user)
+        self.assertEqual((counts.uploading, counts.rejected), (0, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.submit().status_code, 201)
+
+    def test_idempotency_key_replays_response(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.submit(**{"Idempotency-Key": "retry-1"})
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            repeat = self.submit(**{"Idempotency-Key": "retry-1"})
+
+        self.assertEqual(repeat.status_code, 201)
+        self.assertEqual(repeat.json(), first.json())
+        self.assertEqual(repeat["Idempotent-Replayed"], "true")
+        self.assertEqual(callbacks, [])
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_idempotency_key_conflicts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit(**{"Idempotency-Key": "retry-1"})
+        other_app = self.submit(app=create_app("Mail"), **{"Idempotency-Key": "retry-1"})
+        self.assertEqual(other_app.status_code, 422)
+
+        # The same key from another user is a separate request
+        bob = AppUser.objects.create(username="bob")
+        self.client.force_authenticate(bob)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.submit(**{"Idempotency-Key": "retry-1"}).status_code, 201)
+
+    def test_idempotency_key_in_flight_and_expiry(self):
+        original = IdempotencyKey.objects.create
+        repeats = []
+
+        def create_then_repeat(**kwargs):
+            # A retry arrives while the first request is still in the view
+            row = original(**kwargs)
+            with mock.patch.object(IdempotencyKey.objects, "create", original):
+                repeats.append(self.submit(**{"Idempotency-Key": "retry-1"}))
+            return row
+
+        with mock.patch.object(IdempotencyKey.objects, "create", create_then_repeat), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.submit(**{"Idempotency-Key": "retry-1"}).status_code, 201)
+        self.assertEqual(repeats[0].status_code, 409)
+        self.assertEqual(Task.objects.count(), 1)
+
+        # A request that dies, even with a BaseException, releases its key
+        with mock.patch("user_panel.views.is_valid_image", side_effect=SystemExit), self.assertRaises(SystemExit):
+            self.submit(app=create_app("Mail"), **{"Idempotency-Key": "retry-2"})
+        self.assertFalse(IdempotencyKey.objects.filter(status__isnull=True).exists())
+
+        # Past the TTL the key is free again, and pruning drops the stale row
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        Task.objects.update(status="rejected")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.submit(**{"Idempotency-Key": "retry-1"})
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(Task.objects.count(), 2)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        call_command("prune_idempotency_keys", stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_abandoned_in_progress_key_is_freed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit(**{"Idempotency-Key": "retry-1"})
+        # The worker running the first request was killed before storing a response
+        Task.objects.update(status="rejected")
+        IdempotencyKey.objects.update(status=None, data=None)
+        self.assertEqual(self.submit(**{"Idempotency-Key": "retry-1"}).status_code, 409)
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(minutes=10))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.submit(**{"Idempotency-Key": "retry-1"}).status_code, 201)
+        self.assertEqual(IdempotencyKey.objects.get().status, 201)
+
+    def test_rejected_task_can_be_resubmitted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit()
+        Task.objects.update(status="rejected")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.submit().status_code, 201)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_failed_upload_can_be_resumed(self):
+        with override_settings(SCREENSHOT_STORAGE_BACKEND="user_panel.tests.FailingStorage"), \
+                mock.patch("user_panel.uploads.time.sleep") as sleep:
+            with self.assertLogs("user_panel.uploads", "ERROR"), self.captureOnCommitCallbacks(execute=True):
+                self.submit()
+        # Inline uploads don't retry inside the request
+        sleep.assert_not_called()
+        task = Task.objects.get()
+        self.assertEqual(task.status, "uploading")
+        self.assertEqual([path.name for path in spool_path(task.id).parent.iterdir()], [f"task-{task.id}"])
+
+        call_command("resume_uploads", stdout=StringIO())
+        task.refresh_from_db()
+        self.assertEqual(task.status, "pending")
+
+    def test_claimed_spool_file_is_uploaded_once(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            self.submit()
+        task = Task.objects.get()
+        # An in-flight worker holds the file
+        claimed = claim_spool(task.id)
+
+        stderr = StringIO()
+        call_command("resume_uploads", stdout=StringIO(), stderr=stderr)
+        self.assertIn("still being uploaded", stderr.getvalue())
+        self.assertIsNone(process_upload(task.id))
+        task.refresh_from_db()
+        self.assertEqual(task.status, "uploading")
+        self.assertTrue(claimed.exists())
+
+        # A claim left by a dead worker is taken over once it is stale
+        call_command("resume_uploads", stale_after=0, stdout=StringIO())
+        task.refresh_from_db()
+        self.assertEqual(task.status, "pending")
+        self.assertEqual(list(spool_path(task.id).parent.iterdir()), [])
@@ -0,0 +1,273 @@
+"""
+Staged screenshot uploads.
+
+``SubmitTaskView`` no longer pushes the screenshot to remote storage inside
+the request. It streams the multipart file into the local spool directory,
+creates the task in the ``uploading`` state, and returns. After the
+transaction commits, a background worker pool compresses and hashes the
+spooled file (see ``user_panel.imaging``), hands it to the configured
+storage backend and flips the task to ``pending``.
+
+Spool files are named after their task, so uploads interrupted by a restart
+can be re-driven with ``manage.py resume_uploads``, which rejects tasks
+whose spool file is lost. Whoever uploads a file
+first claims it by renaming it atomically, so a resume run and a worker
+never push the same screenshot twice.
+"""
+import abc
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cloudinary.uploader
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from trustpoints_backend.media_urls import resource_url
+from trustpoints_backend.metrics import timed
+
+from .counters import move_task
+from .imaging import process_screenshot
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+
+class ScreenshotStorage(abc.ABC):
+    """Pushes a spooled screenshot to permanent storage."""
+
+    @abc.abstractmethod
+    def save(self, path, name):
+        """Stores the file at ``path`` and returns the value for ``Task.screenshot``."""
+
+
+class CloudinaryScreenshotStorage(ScreenshotStorage):
+    def save(self, path, name):
+        resource = cloudinary.uploader.upload_resource(str(path), type="upload", resource_type="image")
+        return resource.get_prep_value()
+
+
+class LocalScreenshotStorage(ScreenshotStorage):
+    """Filesystem stand-in for development and tests."""
+
+    def save(self, path, name):
+        directory = Path(settings.SCREENSHOT_LOCAL_STORAGE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, directory / name)
+        return f"screenshots/{name}"
+
+
+def get_storage():
+    return import_string(settings.SCREENSHOT_STORAGE_BACKEND)()
+
+
+def spool_path(task_id):
+    return Path(settings.SCREENSHOT_SPOOL_DIR) / f"task-{task_id}"
+
+
+def claim_spool(task_id, stale_after=None):
+    """
+    Atomically renames the task's spool file to a name only this caller
+    knows and returns the new path, or ``None`` when another uploader holds
+    it (or it is gone).
+
+    With ``stale_after`` (seconds), a claim left that long, e.g. by a worker
+    killed mid-upload, is taken over the same way.
+    """
+    path = spool_path(task_id)
+    candidates = [path]
+    if stale_after is not None:
+        cutoff = time.time() - stale_after
+        for held in path.parent.glob(f"{path.name}.claim-*"):
+            # Skip the processed copies written next to a claim
+            if "." in held.name.partition(".claim-")[2]:
+                continue
+            try:
+                if held.stat().st_mtime <= cutoff:
+                    candidates.append(held)
+            except FileNotFoundError:
+                pass
+    for candidate in candidates:
+        claimed = path.with_name(f"{path.name}.claim-{uuid.uuid4().hex}")
+        try:
+            os.rename(candidate, claimed)
+        except FileNotFoundError:
+            continue
+        # Stamp the claim time so stale claims can be told apart
+        os.utime(claimed)
+        return claimed
+    return None
+
+
+def release_spool(task_id, claimed):
+    """Puts a claimed spool file back for the next ``resume_uploads`` run."""
+    try:
+        os.rename(claimed, spool_path(task_id))
+    except FileNotFoundError:
+        pass
+
+
+def remove_spooled(*paths):
+    for path in set(paths):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def spool_screenshot(uploaded_file):
+    """
+    Streams an uploaded file into the spool directory chunk by chunk, under a
+    temporary name; ``adopt_spool`` gives it the task's name once the task
+    exists. The copy runs before the task's transaction, so it never holds
+    the database write lock.
+    """
+    path = Path(settings.SCREENSHOT_SPOOL_DIR) / f"incoming-{uuid.uuid4().hex}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as spool:
+        for chunk in uploaded_file.chunks():
+            spool.write(chunk)
+    return path
+
+
+def adopt_spool(path, task_id):
+    os.replace(path, spool_path(task_id))
+
+
+def is_spooled(task_id):
+    """Whether the task's spool file exists, claimed or not."""
+    path = spool_path(task_id)
+    return path.exists() or any(
+        "." not in held.name.partition(".claim-")[2] for held in path.parent.glob(f"{path.name}.claim-*")
+    )
+
+
+def abandon_upload(task_id):
+    """
+    Rejects an ``uploading`` task whose spool file is gone, so the open-task
+    constraint no longer blocks the user from submitting for the app again.
+    """
+    with transaction.atomic():
+        user_id = (
+            Task.objects.select_for_update().filter(id=task_id, status="uploading")
+            .values_list("user_id", flat=True).first()
+        )
+        if user_id is None:
+            return False
+        Task.objects.filter(id=task_id).update(status="rejected", updated_at=timezone.now())
+        move_task(user_id, "uploading", "rejected")
+    return True
+
+
+def process_upload(task_id, retries=None, stale_after=None):
+    """
+    Compresses a task's spooled screenshot, uploads it and marks the task
+    pending, flagging it when an earlier task has the same perceptual hash
+    (see ``flag_duplicates``).
+
+    Returns ``None`` without doing anything when the spool file is already
+    claimed by another uploader (see ``claim_spool``). Failed attempts are
+    retried ``retries`` times (``SCREENSHOT_UPLOAD_RETRIES`` by default) with
+    backoff; if all fail the spool file is put back and the task stays
+    ``uploading`` for ``resume_uploads`` to pick up.
+    """
+    if retries is None:
+        retries = settings.SCREENSHOT_UPLOAD_RETRIES
+    path = claim_spool(task_id, stale_after)
+    if path is None:
+        return None
+    name = spool_path(task_id).name
+    try:
+        upload_path, screenshot_hash = process_screenshot(path)
+        name = f"{name}{upload_path.suffix}"
+    except Exception:
+        # Upload the original rather than lose the submission
+        logger.exception("Screenshot processing for task %s failed", task_id)
+        upload_path, screenshot_hash = path, None
+
+    for attempt in range(retries + 1):
+        try:
+            with timed("storage"):
+                value = get_storage().save(upload_path, name)
+            break
+        except Exception:
+            if attempt == retries:
+                logger.exception("Screenshot upload for task %s failed", task_id)
+                if upload_path != path:
+                    remove_spooled(upload_path)
+                release_spool(task_id, path)
+                return False
+            time.sleep(2 ** attempt)
+
+    screenshot_url = resource_url(Task._meta.get_field("screenshot").to_python(value))
+    with transaction.atomic():
+        uploaded = Task.objects.filter(id=task_id, status="uploading").update(
+            screenshot=value, screenshot_url=screenshot_url, screenshot_hash=screenshot_hash,
+            status="pending", updated_at=timezone.now(),
+        )
+        if uploaded:
+            user_id = Task.objects.values_list("user_id", flat=True).get(id=task_id)
+            move_task(user_id, "uploading", "pending")
+    if screenshot_hash:
+        flag_duplicates(screenshot_hash)
+    remove_spooled(path, upload_path)
+    return True
+
+
+def flag_duplicates(screenshot_hash):
+    """
+    Points every unflagged task with ``screenshot_hash`` at the earliest one.
+
+    Runs after the caller's hash is committed, so of two workers storing the
+    same hash at once, the one that looks last sees both rows and flags the
+    pair whichever order they finished in.
+    """
+    first = (
+        Task.objects.filter(screenshot_hash=screenshot_hash)
+        .order_by("id").values_list("id", flat=True).first()
+    )
+    if first is not None:
+        Task.objects.filter(screenshot_hash=screenshot_hash, duplicate_of__isnull=True).exclude(id=first).update(
+            duplicate_of=first
+        )
+
+
+def _process_upload_in_worker(task_id):
+    # Worker threads hold their own DB connections; recycle them like a request would
+    close_old_connections()
+    try:
+        process_upload(task_id)
+    finally:
+        close_old_connections()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.SCREENSHOT_UPLOAD_WORKERS, thread_name_prefix="screenshot-upload"
+            )
+        return _executor
+
+
+def schedule_upload(task_id):
+    """
+    Queues a spooled upload on the worker pool, or runs it inline when the
+    pool is disabled. Inline uploads get a single attempt so a storage outage
+    never sleeps inside the request; ``resume_uploads`` retries them later.
+    """
+    if settings.SCREENSHOT_UPLOAD_WORKERS <= 0:
+        return process_upload(task_id, retries=0)
+    _get_executor().submit(_process_upload_in_worker, task_id)
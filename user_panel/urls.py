@@ -1,11 +1,24 @@
+from django.conf import settings
 from django.urls import path
 from .views import *
 
+if settings.ASYNC_VIEWS:
+    # ASGI profile: native async implementations of the read endpoints
+    from .async_views import (
+        AsyncAppDetailView as AppDetailView,
+        AsyncAppListView as AppListView,
+        AsyncTaskDetailView as TaskDetailView,
+        AsyncUserTasksListView as UserTasksListView,
+    )
+
 urlpatterns = [
     path('apps/', AppListView.as_view(), name='app-list'),
     path("tasks/", UserTasksListView.as_view(), name="user-tasks"),
     path("tasks/submit/", SubmitTaskView.as_view(), name="submit-task"),
+    path("tasks/summary/", TaskSummaryView.as_view(), name="task-summary"),
     path('app/<int:pk>/', AppDetailView.as_view(), name='app-detail'),
     path('task/<int:pk>/', TaskDetailView.as_view(), name='task-detail'),
+    path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboard/me/', MyRankView.as_view(), name='leaderboard-me'),
 
 ]
\ No newline at end of file
@@ -1,35 +1,50 @@
+from django.db import IntegrityError, transaction
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
-from .models import App, Task
+from .models import App, Task, User
 from .serializers import AppSerializer, TaskSerializer
-
-class AppListView(APIView):
+from .catalog import catalog_response, get_catalog
+from .counters import get_counts, move_task
+from .leaderboard import leaderboard
+from .idempotency import idempotent
+from .imaging import is_valid_image
+from .uploads import adopt_spool, remove_spooled, schedule_upload, spool_screenshot
+from admin_panel.rollups import record_submission
+from trustpoints_backend.db_router import ReplicaReadMixin
+from trustpoints_backend.query_plan import QueryPlanMixin
+from trustpoints_backend.rows import RowListMixin
+from auth_system.authentication import ClaimsJWTAuthentication
+
+class AppListView(ReplicaReadMixin, APIView):
     """
     API View to fetch all available apps (excluding soft-deleted ones).
+
+    Served from the cached catalog; clients sending a matching
+    If-None-Match get an empty 304.
     """
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        apps = App.objects.filter(is_deleted=False)
-        
-        apps_serializer = AppSerializer(apps, many=True)
-
-        return Response(apps_serializer.data, status=status.HTTP_200_OK)
+        etag, body = get_catalog()
+        return catalog_response(request, etag, body)
 
 
-class UserTasksListView(generics.ListAPIView):
+class UserTasksListView(ReplicaReadMixin, RowListMixin, QueryPlanMixin, generics.ListAPIView):
     serializer_class = TaskSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user)
+        return Task.objects.filter(user_id=self.request.user.id)
 
-class AppDetailView(generics.RetrieveAPIView):
+class AppDetailView(ReplicaReadMixin, generics.RetrieveAPIView):
     queryset = App.objects.all()
     serializer_class = AppSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
@@ -40,6 +55,7 @@ class SubmitTaskView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser)  # Allows handling image uploads
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         app_id = request.data.get("app")
         screenshot = request.data.get("screenshot")
@@ -48,25 +64,38 @@ class SubmitTaskView(APIView):
             return Response({"error": "App ID is required"}, status=400)
         if not screenshot:
             return Response({"error": "Screenshot is required"}, status=400)
+        if not is_valid_image(screenshot):
+            return Response({"error": "Screenshot must be an image"}, status=400)
 
         try:
             app = App.objects.get(id=app_id)
         except App.DoesNotExist:
             return Response({"error": "App not found"}, status=404)
 
-        # Check if a task already exists (Pending or Verified)
-        existing_task = Task.objects.filter(user=request.user, app=app).exclude(status="rejected").first()
-        if existing_task:
+        # Spool the screenshot, then create the task and hand the file over; the upload
+        # itself runs in the background. The task_one_open_per_user_app constraint
+        # rejects a second open task for the app.
+        spooled = spool_screenshot(screenshot)
+        try:
+            with transaction.atomic():
+                task = Task.objects.create(user=request.user, app=app, status="uploading")
+                move_task(request.user.id, to_status="uploading")
+                record_submission(app.id)
+                adopt_spool(spooled, task.id)
+                transaction.on_commit(lambda: schedule_upload(task.id))
+        except IntegrityError:
+            remove_spooled(spooled)
             return Response({"error": "You have already submitted a task for this app."}, status=400)
-
-        # Create a new task
-        task = Task.objects.create(user=request.user, app=app, screenshot=screenshot)
+        except BaseException:
+            remove_spooled(spooled)
+            raise
 
         return Response(TaskSerializer(task).data, status=201)
     
-class TaskDetailView(generics.RetrieveAPIView):
+class TaskDetailView(ReplicaReadMixin, QueryPlanMixin, generics.RetrieveAPIView):
     queryset = Task.objects.all()  # Fetch Task objects, not App objects
     serializer_class = TaskSerializer
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
@@ -78,5 +107,44 @@ class TaskDetailView(generics.RetrieveAPIView):
 # Profile management.
 
 
+class LeaderboardView(ReplicaReadMixin, APIView):
+    """
+    Top users by points. ?limit= defaults to 10, at most 100.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), 100)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        top = leaderboard.top(limit)
+        usernames = dict(
+            User.objects.filter(id__in=[user_id for _, user_id, _ in top]).values_list("id", "username")
+        )
+        return Response([
+            {"rank": rank, "user_id": user_id, "username": usernames.get(user_id), "points": points}
+            for rank, user_id, points in top
+        ], status=status.HTTP_200_OK)
+
 
+class TaskSummaryView(ReplicaReadMixin, APIView):
+    """
+    Number of the user's tasks in each status, plus the total.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
 
+    def get(self, request):
+        return Response(get_counts(request.user.id), status=status.HTTP_200_OK)
+
+
+class MyRankView(ReplicaReadMixin, APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        rank, points, total = leaderboard.rank(request.user.id)
+        return Response({"rank": rank, "points": points, "total_users": total}, status=status.HTTP_200_OK)